@@ -9,29 +9,29 @@
 #     }
 
 import frappe
+from frappe import _
+from frappe.utils import flt
+
+from boq.instrumentation import instrument
+from boq.stock import get_item_codes, get_warehouse_stock_map
+
+PIVOT_DOCTYPES = ("Technical Offer", "Purchase BOQ", "Commercial Offer")
+
 
 @frappe.whitelist()
+@instrument
 def get_sales_boq_data(sales_boq):
     """Return Sales BOQ items, services, and current stock for each item."""
-    doc = frappe.get_doc("Sales BOQ", sales_boq)
+    doc = frappe.get_doc("Technical Offer", sales_boq)
 
     items_with_stock = []
+
+    # Per-warehouse stock for every item in one Bin query
+    warehouse_map = get_warehouse_stock_map(get_item_codes(doc.items))
+
     for item in doc.items:
-        # Default stock
-        stock_qty = 0
-        warehouse_stock = []
-
-        # Fetch from Bin table
-        bins = frappe.get_all(
-            "Bin",
-            filters={"item_code": item.item_code},
-            fields=["warehouse", "actual_qty"]
-        )
-
-        if bins:
-            warehouse_stock = bins
-            stock_qty = sum(b.actual_qty for b in bins)
-            
+        warehouse_stock = warehouse_map.get(item.item_code) or []
+        stock_qty = sum(b.actual_qty for b in warehouse_stock)
 
         # Add stock data to each item row
         items_with_stock.append({
@@ -39,8 +39,67 @@ def get_sales_boq_data(sales_boq):
             "current_stock": stock_qty,
             "warehouse_stock": warehouse_stock
         })
-    frappe.msgprint(items_with_stock)
+
     return {
         "items": items_with_stock,
         "services": doc.services
     }
+
+
+@frappe.whitelist()
+@instrument
+def get_warehouse_stock_pivot(doctype, name, warehouses=None):
+    """Item x warehouse actual_qty matrix for every item of a BOQ document
+
+    Columnar response: items and warehouses are the row and column labels,
+    qty[i][j] is the stock of items[i] in warehouses[j], total[i] the row sum.
+    Items are in document order; items without stock get a row of zeros.
+    """
+    if doctype not in PIVOT_DOCTYPES:
+        frappe.throw(_("Warehouse stock is not supported for {0}").format(doctype))
+
+    frappe.has_permission(doctype, "read", name, throw=True)
+
+    if isinstance(warehouses, str):
+        warehouses = frappe.parse_json(warehouses) if warehouses.startswith("[") else [warehouses]
+    warehouses = list(filter(None, warehouses or []))
+
+    child_doctype = frappe.get_meta(doctype).get_field("items").options
+    warehouse_condition = "AND bin.warehouse IN %(warehouses)s" if warehouses else ""
+
+    rows = frappe.db.sql(
+        f"""
+        SELECT item.item_code, bin.warehouse, bin.actual_qty
+        FROM (
+            SELECT item_code, MIN(idx) AS idx
+            FROM `tab{child_doctype}`
+            WHERE parent = %(name)s
+                AND parenttype = %(doctype)s
+                AND parentfield = 'items'
+                AND IFNULL(item_code, '') != ''
+            GROUP BY item_code
+        ) item
+        LEFT JOIN `tabBin` bin
+            ON bin.item_code = item.item_code {warehouse_condition}
+        ORDER BY item.idx, bin.warehouse
+        """,
+        {"name": name, "doctype": doctype, "warehouses": tuple(warehouses)},
+        as_list=True
+    )
+
+    items = list(dict.fromkeys(row[0] for row in rows))
+    columns = warehouses or sorted({row[1] for row in rows if row[1]})
+    item_index = {item_code: i for i, item_code in enumerate(items)}
+    warehouse_index = {warehouse: j for j, warehouse in enumerate(columns)}
+
+    qty = [[0] * len(columns) for _item in items]
+    for item_code, warehouse, actual_qty in rows:
+        if warehouse in warehouse_index:
+            qty[item_index[item_code]][warehouse_index[warehouse]] = flt(actual_qty)
+
+    return {
+        "items": items,
+        "warehouses": columns,
+        "qty": qty,
+        "total": [flt(sum(row)) for row in qty]
+    }
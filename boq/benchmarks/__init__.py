@@ -0,0 +1,7 @@
+# Benchmarks for BOQ server code. Run them against a site with bench, e.g.
+#
+#   bench --site <site> execute boq.benchmarks.revision.run --kwargs "{'docname': 'CSPL-...'}"
+#   bench --site <site> execute boq.benchmarks.suite.run --kwargs "{'sizes': [100, 1000], 'output': '/tmp/boq.json'}"
+#
+# Each benchmark rolls back whatever it writes; boq.benchmarks.suite.clear
+# removes synthetic data left behind by an interrupted run.
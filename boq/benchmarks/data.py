@@ -0,0 +1,236 @@
+# Copyright (c) 2026, Som and contributors
+# For license information, please see license.txt
+
+# Synthetic BOQ data for benchmarks. Everything is named or tagged with a
+# prefix so it can be told apart from real data and removed with cleanup().
+# Master data and child rows are written with multi-row INSERTs; building a
+# 10,000 row offer through the ORM would take longer than the benchmarks.
+
+import random
+
+import frappe
+from frappe.utils import now
+from frappe.utils.nestedset import get_root_of
+
+from boq.bulk import BULK_INSERT_CHUNK_SIZE
+from boq.item_search import index_items
+
+DEFAULT_PREFIX = "BOQBENCH"
+WAREHOUSE_COUNT = 3
+UOM = "Nos"
+
+
+def make_dataset(rows=1000, services=20, prefix=DEFAULT_PREFIX, seed=42):
+    """Create Items, Bins, Services and a submitted Technical Offer with `rows` item rows
+
+    Returns a _dict with technical_offer, customer, items and warehouses.
+    """
+    rng = random.Random(seed)
+    company = frappe.defaults.get_global_default("company") or frappe.get_all("Company", pluck="name", limit=1)[0]
+
+    item_group = _make_item_group(prefix)
+    warehouses = [_make_warehouse(prefix, company, i) for i in range(1, WAREHOUSE_COUNT + 1)]
+    items = _make_items(prefix, rows, item_group, rng)
+    _make_bins(items, warehouses, rng)
+    service_codes = _make_services(prefix, services)
+
+    offer = frappe.get_doc({
+        "doctype": "Technical Offer",
+        "party": prefix
+    }).insert(ignore_permissions=True)
+
+    _bulk_insert_rows(
+        "Sales BOQ Item", offer.name, "Technical Offer", "items",
+        ["item_code", "item_name", "item_category", "qyt", "uom"],
+        [(item, item, item_group, rng.randint(1, 50), UOM) for item in items],
+        docstatus=1
+    )
+    _bulk_insert_rows(
+        "Sales Services", offer.name, "Technical Offer", "services",
+        ["service_code", "service_name", "description"],
+        [(code, code, f"<p>{code}</p>") for code in service_codes],
+        docstatus=1
+    )
+    offer.db_set("docstatus", 1, update_modified=False)
+
+    return frappe._dict({
+        "technical_offer": offer.name,
+        "customer": _make_customer(prefix),
+        "items": items,
+        "warehouses": warehouses
+    })
+
+
+def cleanup(prefix=DEFAULT_PREFIX):
+    """Delete everything make_dataset (and the benchmarks) created for prefix"""
+    offers = frappe.get_all("Technical Offer", filters={"party": prefix}, pluck="name")
+    purchase_boqs = frappe.get_all("Purchase BOQ", filters={"sales_boq": ["in", offers]}, pluck="name") if offers else []
+    commercial_offers = frappe.get_all(
+        "Commercial Offer", filters={"purchase_boq": ["in", purchase_boqs]}, pluck="name"
+    ) if purchase_boqs else []
+
+    for doctype, names in (
+        ("Technical Offer", offers),
+        ("Purchase BOQ", purchase_boqs),
+        ("Commercial Offer", commercial_offers),
+    ):
+        if not names:
+            continue
+
+        for df in frappe.get_meta(doctype).get_table_fields():
+            frappe.db.delete(df.options, {"parent": ["in", names], "parenttype": doctype})
+        frappe.db.delete("BOQ Revision Counter", {"reference_doctype": doctype, "base_document": ["in", names]})
+        frappe.db.delete(doctype, {"name": ["in", names]})
+
+    customer = f"{prefix} Customer"
+    for sales_order in frappe.get_all("Sales Order", filters={"customer": customer}, pluck="name"):
+        frappe.db.delete("Sales Order Item", {"parent": sales_order})
+        frappe.db.delete("Sales Order", {"name": sales_order})
+
+    frappe.db.delete("BOQ Item Search Token", {"item_code": ["like", f"{prefix}-%"]})
+    frappe.db.delete("Bin", {"item_code": ["like", f"{prefix}-%"]})
+    frappe.db.delete("Item", {"name": ["like", f"{prefix}-%"]})
+    frappe.db.delete("Services", {"name": ["like", f"{prefix}-%"]})
+    frappe.db.delete("Warehouse", {"name": ["like", f"{prefix} WH %"]})
+    frappe.db.delete("Customer", {"name": customer})
+    frappe.db.delete("Item Group", {"name": f"{prefix} Items"})
+    frappe.db.commit()
+
+
+def _make_item_group(prefix):
+    name = f"{prefix} Items"
+    if not frappe.db.exists("Item Group", name):
+        frappe.get_doc({
+            "doctype": "Item Group",
+            "item_group_name": name,
+            "parent_item_group": get_root_of("Item Group")
+        }).insert(ignore_permissions=True)
+
+    return name
+
+
+def _make_warehouse(prefix, company, i):
+    abbr = frappe.get_cached_value("Company", company, "abbr")
+    name = f"{prefix} WH {i} - {abbr}"
+    if not frappe.db.exists("Warehouse", name):
+        frappe.get_doc({
+            "doctype": "Warehouse",
+            "warehouse_name": f"{prefix} WH {i}",
+            "company": company
+        }).insert(ignore_permissions=True)
+
+    return name
+
+
+def _make_customer(prefix):
+    name = f"{prefix} Customer"
+    if not frappe.db.exists("Customer", name):
+        frappe.get_doc({
+            "doctype": "Customer",
+            "customer_name": name,
+            "customer_type": "Company"
+        }).insert(ignore_permissions=True)
+
+    return name
+
+
+def _make_items(prefix, count, item_group, rng):
+    existing = set(frappe.get_all("Item", filters={"name": ["like", f"{prefix}-%"]}, pluck="name"))
+    names = [f"{prefix}-{i:05d}" for i in range(1, count + 1)]
+    timestamp = now()
+    user = frappe.session.user
+
+    new = [
+        {
+            "name": name,
+            "item_name": f"{prefix} valve {rng.choice(['SS304', 'SS316', 'CS', 'PVC'])} {rng.randint(15, 300)}mm",
+            "custom_moc": rng.choice(["SS304", "SS316", "CS", "PVC"]),
+            "custom_make": rng.choice(["Audco", "L&T", "Kirloskar"]),
+            "standard_rate": rng.randint(100, 50000),
+        }
+        for name in names if name not in existing
+    ]
+    if new:
+        frappe.db.bulk_insert(
+            "Item",
+            [
+                "name", "creation", "modified", "owner", "modified_by", "item_code", "item_name",
+                "item_group", "stock_uom", "is_stock_item", "custom_moc", "custom_make", "standard_rate"
+            ],
+            [
+                (
+                    item["name"], timestamp, timestamp, user, user, item["name"], item["item_name"],
+                    item_group, UOM, 1, item["custom_moc"], item["custom_make"], item["standard_rate"]
+                )
+                for item in new
+            ],
+            chunk_size=BULK_INSERT_CHUNK_SIZE
+        )
+        index_items(new)
+
+    return names
+
+
+def _make_bins(items, warehouses, rng):
+    existing = set(frappe.get_all("Bin", filters={"item_code": ["in", items]}, pluck="item_code"))
+    timestamp = now()
+    user = frappe.session.user
+
+    values = []
+    for item in items:
+        if item in existing:
+            continue
+        for warehouse in warehouses:
+            actual = rng.randint(0, 100)
+            reserved = rng.randint(0, actual) if actual else 0
+            ordered = rng.randint(0, 20)
+            values.append((
+                frappe.generate_hash(length=10), timestamp, timestamp, user, user,
+                item, warehouse, UOM, actual, reserved, ordered, actual - reserved + ordered
+            ))
+
+    frappe.db.bulk_insert(
+        "Bin",
+        [
+            "name", "creation", "modified", "owner", "modified_by", "item_code", "warehouse",
+            "stock_uom", "actual_qty", "reserved_qty", "ordered_qty", "projected_qty"
+        ],
+        values,
+        chunk_size=BULK_INSERT_CHUNK_SIZE
+    )
+
+
+def _make_services(prefix, count):
+    names = [f"{prefix}-SRV-{i:03d}" for i in range(1, count + 1)]
+    existing = set(frappe.get_all("Services", filters={"name": ["in", names]}, pluck="name"))
+    timestamp = now()
+    user = frappe.session.user
+
+    frappe.db.bulk_insert(
+        "Services",
+        ["name", "creation", "modified", "owner", "modified_by"],
+        [(name, timestamp, timestamp, user, user) for name in names if name not in existing]
+    )
+
+    return names
+
+
+def _bulk_insert_rows(child_doctype, parent, parenttype, parentfield, fields, values, docstatus=0):
+    timestamp = now()
+    user = frappe.session.user
+
+    frappe.db.bulk_insert(
+        child_doctype,
+        [
+            "name", "creation", "modified", "owner", "modified_by", "docstatus",
+            "parent", "parenttype", "parentfield", "idx", *fields
+        ],
+        [
+            (
+                frappe.generate_hash(length=10), timestamp, timestamp, user, user, docstatus,
+                parent, parenttype, parentfield, idx, *row
+            )
+            for idx, row in enumerate(values, start=1)
+        ],
+        chunk_size=BULK_INSERT_CHUNK_SIZE
+    )
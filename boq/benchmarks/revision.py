@@ -0,0 +1,42 @@
+# Copyright (c) 2026, Som and contributors
+# For license information, please see license.txt
+
+# Compares the two create_new_revision paths on an existing Technical Offer:
+# the full path (get_doc + copy_doc + row-by-row insert) and the fast path
+# (parent insert + INSERT ... SELECT per child table).
+
+import json
+import time
+
+import frappe
+
+from boq.boq.doctype.technical_offer.technical_offer import create_new_revision, get_child_row_count
+
+
+def run(docname, repeat=3):
+    """Time both revision paths on docname and print the results as JSON"""
+    results = {
+        "docname": docname,
+        "rows": get_child_row_count("Technical Offer", docname),
+        "repeat": repeat
+    }
+
+    for mode, fast in (("full", 0), ("fast", 1)):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            create_new_revision(docname, fast=fast)
+            timings.append(time.perf_counter() - start)
+
+            # keep the source as the latest revision for the next run
+            frappe.db.rollback()
+
+        results[mode] = {
+            "min": round(min(timings), 4),
+            "avg": round(sum(timings) / len(timings), 4)
+        }
+
+    results["speedup"] = round(results["full"]["avg"] / results["fast"]["avg"], 2) if results["fast"]["avg"] else None
+
+    print(json.dumps(results, indent=1))
+    return results
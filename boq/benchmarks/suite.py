@@ -0,0 +1,138 @@
+# Copyright (c) 2026, Som and contributors
+# For license information, please see license.txt
+
+# Benchmark suite for the BOQ document flow on synthetic data:
+#
+#   bench --site <site> execute boq.benchmarks.suite.run --kwargs "{'sizes': [100, 1000, 10000]}"
+#
+# For every size a fresh dataset is generated, each step is timed and its
+# SQL queries counted, and everything is rolled back afterwards. Results
+# are printed as JSON and, with output=<path>, written to a file so runs
+# can be compared.
+
+import json
+
+import frappe
+from frappe.utils import now
+
+from boq.benchmarks.data import DEFAULT_PREFIX, cleanup, make_dataset
+from boq.boq.doctype.commercial_offer.commercial_offer import (
+    build_purchase_boq_data,
+    build_sales_order,
+    get_item_details_map,
+)
+from boq.boq.doctype.purchase_boq.purchase_boq import build_sales_boq_data, make_commercial_offer
+from boq.boq.doctype.technical_offer.technical_offer import create_new_revision, make_purchase_boq
+from boq.instrumentation import track
+from boq.stock import get_item_codes
+
+DEFAULT_SIZES = (100, 1000, 10000)
+
+
+def run(sizes=DEFAULT_SIZES, repeat=3, services=20, prefix=DEFAULT_PREFIX, output=None):
+    """Benchmark every step for each dataset size; return and print the results"""
+    results = {
+        "timestamp": now(),
+        "repeat": repeat,
+        "sizes": {}
+    }
+
+    for rows in sizes:
+        try:
+            results["sizes"][str(rows)] = run_size(rows, repeat=repeat, services=services, prefix=prefix)
+        finally:
+            frappe.db.rollback()
+            frappe.clear_cache()
+
+    report = json.dumps(results, indent=1, default=str)
+    if output:
+        with open(output, "w") as f:
+            f.write(report)
+
+    print(report)
+    return results
+
+
+def run_size(rows, repeat=3, services=20, prefix=DEFAULT_PREFIX):
+    """Generate one dataset and benchmark the flow on it, inside the current transaction"""
+    data = make_dataset(rows=rows, services=services, prefix=prefix)
+    technical_offer = data.technical_offer
+
+    purchase_boq = make_purchase_boq(technical_offer)
+    commercial_offer = make_commercial_offer(purchase_boq)
+    _submit("Commercial Offer", commercial_offer, customer_link=data.customer)
+
+    # the payload builders, not their cached endpoints: a repeat would only time a cache hit
+    steps = {
+        "build_sales_boq_data": lambda: build_sales_boq_data(technical_offer),
+        "build_purchase_boq_data": lambda: build_purchase_boq_data(purchase_boq),
+        "PurchaseBOQ.validate": lambda: _validate("Purchase BOQ", purchase_boq),
+        "CommercialOffer.validate": lambda: _validate("Commercial Offer", commercial_offer),
+        "create_new_revision": lambda: create_new_revision(technical_offer),
+        "make_sales_order": lambda: _make_sales_order(commercial_offer),
+    }
+
+    return {
+        "rows": rows,
+        "services": services,
+        "steps": {name: measure(step, repeat=repeat) for name, step in steps.items()}
+    }
+
+
+def measure(fn, repeat=3):
+    """Time fn and count its queries and rows over `repeat` runs, each rolled back to a savepoint"""
+    timings = []
+    queries = []
+    rows = []
+    error = None
+
+    for i in range(repeat):
+        savepoint = f"boq_bench_{i}"
+        frappe.db.savepoint(savepoint)
+
+        try:
+            with track() as metrics:
+                fn()
+            timings.append(metrics.duration)
+            queries.append(metrics.queries)
+            rows.append(metrics.rows)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            break
+        finally:
+            frappe.db.rollback(save_point=savepoint)
+
+    if not timings:
+        return {"error": error}
+
+    return {
+        "min": round(min(timings), 4),
+        "avg": round(sum(timings) / len(timings), 4),
+        "queries": max(queries),
+        "rows": max(rows),
+        "error": error
+    }
+
+
+def _validate(doctype, name):
+    # controller validate plus doc_events hooks, as on save
+    doc = frappe.get_doc(doctype, name)
+    doc.run_method("validate")
+
+
+def _make_sales_order(commercial_offer):
+    # make_sales_order without its commit, so the run can be rolled back
+    offer = frappe.get_doc("Commercial Offer", commercial_offer)
+    build_sales_order(offer, {}, get_item_details_map(get_item_codes(offer.items))).insert()
+
+
+def _submit(doctype, name, **values):
+    # synthetic documents skip the submit workflow
+    frappe.db.set_value(doctype, name, {"docstatus": 1, **values}, update_modified=False)
+    for df in frappe.get_meta(doctype).get_table_fields():
+        frappe.db.set_value(df.options, {"parent": name, "parenttype": doctype}, "docstatus", 1, update_modified=False)
+
+
+def clear(prefix=DEFAULT_PREFIX):
+    """Remove synthetic data left behind by an interrupted run"""
+    cleanup(prefix)
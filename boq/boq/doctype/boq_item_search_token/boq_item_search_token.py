@@ -0,0 +1,13 @@
+# Copyright (c) 2026, Som and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class BOQItemSearchToken(Document):
+    pass
+
+
+def on_doctype_update():
+    frappe.db.add_index("BOQ Item Search Token", ["search_field", "token"])
@@ -0,0 +1,75 @@
+# Copyright (c) 2026, Som and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from boq.item_search import get_matching_items
+
+
+class TestBOQItemSearchToken(FrappeTestCase):
+	def setUp(self):
+		# a word no other item contains, so results only hold the items made here
+		self.marker = "q" + frappe.generate_hash(length=7)
+		self.parent_group = make_item_group(f"_Test BOQ Parent {self.marker}", is_group=1)
+		self.child_group = make_item_group(f"_Test BOQ Child {self.marker}", parent=self.parent_group)
+		other_group = make_item_group(f"_Test BOQ Other {self.marker}")
+
+		self.prefix_item = make_item(f"{self.marker} Ball Valve", self.parent_group)
+		self.inner_item = make_item(f"Big X{self.marker} Valve", self.parent_group)
+		self.child_item = make_item(f"Bar Stock {self.marker}", self.child_group)
+		self.other_item = make_item(f"Bash {self.marker}", other_group)
+
+	def test_prefix_matches_rank_first(self):
+		names = get_matching_items({"search_item_name": self.marker})
+
+		self.assertEqual(names[0], self.prefix_item)
+		self.assertEqual(sorted(names[1:]), sorted([self.inner_item, self.child_item, self.other_item]))
+
+	def test_short_terms_match_word_starts(self):
+		self.assertEqual(
+			sorted(get_matching_items({"search_item_name": "ba", "search_item_group": self.parent_group})),
+			sorted([self.prefix_item, self.child_item])
+		)
+
+	def test_item_group_includes_descendants(self):
+		self.assertEqual(
+			sorted(get_matching_items({"search_item_name": self.marker, "search_item_group": self.parent_group})),
+			sorted([self.prefix_item, self.inner_item, self.child_item])
+		)
+		self.assertEqual(
+			get_matching_items({"search_item_name": self.marker, "search_item_group": self.child_group}),
+			[self.child_item]
+		)
+
+	def test_index_follows_item_changes(self):
+		filters = {"search_item_group": self.parent_group}
+
+		item = frappe.get_doc("Item", self.inner_item)
+		item.item_name = f"Gate {self.marker}"
+		item.save()
+
+		self.assertEqual(get_matching_items({**filters, "search_item_name": "gate"}), [self.inner_item])
+		self.assertEqual(get_matching_items({**filters, "search_item_name": "big"}), [])
+
+		new_name = frappe.rename_doc("Item", self.prefix_item, f"{self.prefix_item}-NEW")
+		self.assertEqual(get_matching_items({**filters, "search_item_name": "ball"}), [new_name])
+
+
+def make_item_group(name, parent="All Item Groups", is_group=0):
+	return frappe.get_doc({
+		"doctype": "Item Group",
+		"item_group_name": name,
+		"parent_item_group": parent,
+		"is_group": is_group,
+	}).insert().name
+
+
+def make_item(item_name, item_group):
+	return frappe.get_doc({
+		"doctype": "Item",
+		"item_code": f"_T-BOQ-{frappe.generate_hash(length=8)}",
+		"item_name": item_name,
+		"item_group": item_group,
+		"stock_uom": "Nos",
+	}).insert().name
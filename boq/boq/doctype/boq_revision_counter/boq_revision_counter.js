@@ -0,0 +1,8 @@
+// Copyright (c) 2026, Som and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("BOQ Revision Counter", {
+// 	refresh(frm) {
+
+// 	},
+// });
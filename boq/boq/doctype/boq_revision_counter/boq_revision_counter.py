@@ -0,0 +1,11 @@
+# Copyright (c) 2026, Som and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+from boq.revision import get_counter_name
+
+
+class BOQRevisionCounter(Document):
+    def autoname(self):
+        self.name = get_counter_name(self.reference_doctype, self.base_document)
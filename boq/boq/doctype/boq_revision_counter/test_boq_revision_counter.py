@@ -0,0 +1,98 @@
+# Copyright (c) 2026, Som and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from boq.boq.doctype.purchase_boq.test_purchase_boq import make_purchase_boq, make_revision
+from boq.revision import (
+	COUNTER_DOCTYPE,
+	LATEST_REVISION_CACHE_KEY,
+	REVISION_BASE_CACHE_KEY,
+	compute_revision_diff,
+	get_counter_name,
+	get_latest_revision,
+)
+
+
+class TestBOQRevisionCounter(FrappeTestCase):
+	def setUp(self):
+		# cached chains of rolled back test documents would be stale
+		clear_revision_cache()
+		self.addCleanup(clear_revision_cache)
+
+	def test_allocate_revision(self):
+		base = make_purchase_boq([{"tag_no": "A", "qyt": 1, "rate": 10}])
+		counter_name = get_counter_name("Purchase BOQ", base.name)
+		self.assertEqual(frappe.db.get_value(COUNTER_DOCTYPE, counter_name, "latest_name"), base.name)
+
+		r1 = make_revision(base)
+		r2 = make_revision(r1)
+
+		self.assertEqual((r1.name, r1.revision), (f"{base.name}-R1", 1))
+		self.assertEqual((r2.name, r2.revision), (f"{base.name}-R2", 2))
+		self.assertEqual(r2.previous_version, r1.name)
+		self.assertEqual(r2.base_document, base.name)
+
+		counter = frappe.db.get_value(COUNTER_DOCTYPE, counter_name, ["last_revision", "latest_name"], as_dict=True)
+		self.assertEqual((counter.last_revision, counter.latest_name), (2, r2.name))
+		self.assertEqual(
+			[frappe.db.get_value("Purchase BOQ", name, "is_latest") for name in (base.name, r1.name, r2.name)],
+			[0, 0, 1]
+		)
+
+	def test_delete_latest_revision(self):
+		base = make_purchase_boq([{"tag_no": "A", "qyt": 1, "rate": 10}])
+		r1 = make_revision(base)
+		r2 = make_revision(r1)
+		counter_name = get_counter_name("Purchase BOQ", base.name)
+
+		frappe.delete_doc("Purchase BOQ", r2.name)
+
+		self.assertEqual(frappe.db.get_value("Purchase BOQ", r1.name, "is_latest"), 1)
+		self.assertEqual(frappe.db.get_value(COUNTER_DOCTYPE, counter_name, "latest_name"), r1.name)
+
+		frappe.delete_doc("Purchase BOQ", r1.name)
+		frappe.delete_doc("Purchase BOQ", base.name)
+
+		self.assertFalse(frappe.db.exists(COUNTER_DOCTYPE, counter_name))
+
+	def test_get_latest_revision(self):
+		base = make_purchase_boq([{"tag_no": "A", "qyt": 1, "rate": 10}])
+		self.assertEqual(get_latest_revision("Purchase BOQ", base.name), base.name)
+
+		r1 = make_revision(base)
+		r2 = make_revision(r1)
+		for name in (base.name, r1.name, r2.name):
+			self.assertEqual(get_latest_revision("Purchase BOQ", name), r2.name)
+
+		# deleting the latest revision drops the cached chain
+		frappe.delete_doc("Purchase BOQ", r2.name)
+		self.assertEqual(get_latest_revision("Purchase BOQ", base.name), r1.name)
+
+		self.assertIsNone(get_latest_revision("Purchase BOQ", "not-a-purchase-boq"))
+
+	def test_compute_revision_diff(self):
+		base = make_purchase_boq([
+			{"tag_no": "A", "qyt": 1, "rate": 10},
+			{"tag_no": "B", "qyt": 2, "rate": 10},
+		])
+		r1 = make_revision(base, items=[
+			{"tag_no": "A", "qyt": 5, "rate": 10},
+			{"tag_no": "C", "qyt": 1, "rate": 3},
+		])
+
+		diff = compute_revision_diff("Purchase BOQ", base.name, r1.name)
+		items = diff["tables"]["items"]
+
+		self.assertEqual(diff["summary"], {"added": 1, "removed": 1, "changed": 1})
+		self.assertEqual([row.tag_no for row in items["added"]], ["C"])
+		self.assertEqual([row.tag_no for row in items["removed"]], ["B"])
+		self.assertEqual(items["changed"][0]["key"]["tag_no"], "A")
+		self.assertEqual(items["changed"][0]["changes"]["qyt"], [1, 5])
+		self.assertEqual(items["changed"][0]["changes"]["final_amount"], [10, 50])
+		self.assertEqual(diff["tables"]["services"], {"added": [], "removed": [], "changed": []})
+
+
+def clear_revision_cache():
+	frappe.cache().delete_value([REVISION_BASE_CACHE_KEY, LATEST_REVISION_CACHE_KEY])
@@ -4,7 +4,41 @@
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import today, add_days
+from frappe.utils import add_days, flt, today
+
+from boq.bulk import bulk_insert_children
+from boq.child_rows import load_first_page, set_lazy_rows_onload, validate_rows_loaded
+from boq.instrumentation import instrument
+from boq.response_cache import get_cached_payload
+from boq.revision import (
+    add_revision_indexes,
+    allocate_revision,
+    get_latest_revision,
+    remove_from_revision_chain,
+    start_revision_chain,
+    validate_latest_revision,
+)
+from boq.stock import (
+    get_cached_stock_map,
+    get_item_codes,
+    invalidate_offer_stock_cache,
+)
+from boq.stock import validate_stock_availability as validate_live_stock
+from boq.totals import calculate_totals
+
+# Row fields set by the totals engine, mapped to computed columns
+ITEM_TOTAL_FIELDS = {
+    "amount": "final_amount",
+    "discount_amount": "discount_amount",
+    "final_amount": "final_amount"
+}
+SERVICE_TOTAL_FIELDS = {
+    "amount": "final_amount",
+    "discount_amount": "discount_amount",
+    "final_amount": "final_amount"
+}
+
+
 class CommercialOffer(Document):
     def autoname(self):
         if not self.purchase_boq:
@@ -22,36 +56,18 @@ class CommercialOffer(Document):
             self.revision = 0
             self.previous_version = None
             self.is_latest = 1
+            start_revision_chain(self.doctype, base)
             return
 
         # ------------------------------------------------
         # CASE 2: CREATE REVISION (R1, R2, ...)
         # ------------------------------------------------
-        max_revision = frappe.db.get_value(
-            self.doctype,
-            {"base_document": self.base_document},
-            "MAX(revision)"
-        ) or 0
+        revision = allocate_revision(self.doctype, self.base_document)
 
-        next_revision = max_revision + 1
-
-        self.name = f"{self.base_document}-R{next_revision}"
-        self.revision = next_revision
+        self.name = revision.name
+        self.revision = revision.revision
+        self.previous_version = revision.previous_version
         self.is_latest = 1
-
-        self.previous_version = frappe.db.get_value(
-            self.doctype,
-            {"base_document": self.base_document, "revision": max_revision},
-            "name"
-        )
-
-        frappe.db.set_value(
-            self.doctype,
-            {"base_document": self.base_document},
-            "is_latest",
-            0,
-            update_modified=False
-        )
     # def autoname(self):
     #     """Generate name from Purchase BOQ by replacing -P with -F"""
     #     if self.purchase_boq:
@@ -62,60 +78,79 @@ class CommercialOffer(Document):
     
     def validate(self):
         """Calculate totals on save"""
-        self.calculate_item_totals()
-        self.calculate_service_totals()
-        self.calculate_grand_total()
-    
-    def calculate_item_totals(self):
-        """Calculate amounts for all items"""
-        item_total = 0
-        
-        for item in self.items:
-            qty = item.qyt or 0
-            rate = item.rate or 0
-            discount = item.discount or 0
-            
-            amount = qty * rate
-            discount_amount = amount * (discount / 100)
-            final_amount = amount + discount_amount
-            
-            item.amount = final_amount
-            item.discount_amount = discount_amount
-            
-            item_total += final_amount
-        
-        self.item_total = item_total
-    
-    def calculate_service_totals(self):
-        """Calculate amounts for all services"""
-        service_total = 0
-        
-        for service in self.services:
-            cost = service.service_cost or 0
-            discount = service.discount or 0
-            
-            discount_amount = cost * (discount / 100)
-            final_amount = cost + discount_amount
-            
-            service.amount = final_amount
-            service.discount_amount = discount_amount
-            
-            service_total += final_amount
-        
-        self.services_total = service_total
-    
-    def calculate_grand_total(self):
-        """Calculate grand total"""
-        self.grand_total = (self.item_total or 0) + (self.services_total or 0)
-        
+        validate_rows_loaded(self)
+        validate_latest_revision(self, "purchase_boq", "Purchase BOQ")
+        calculate_totals(self, ITEM_TOTAL_FIELDS, SERVICE_TOTAL_FIELDS)
+
+    def db_insert(self, *args, **kwargs):
+        """Insert the parent, then all child rows in chunked multi-row INSERTs"""
+        super().db_insert(*args, **kwargs)
+        bulk_insert_children(self)
+
+    def load_from_db(self):
+        """Forms of large documents read only the first page of item rows"""
+        if not load_first_page(self):
+            super().load_from_db()
+
+    def onload(self):
+        set_lazy_rows_onload(self)
+
+    def before_update_after_submit(self):
+        validate_rows_loaded(self)
+
+    def before_cancel(self):
+        validate_rows_loaded(self)
+
+    def on_trash(self):
+        remove_from_revision_chain(self)
+
+
+def on_doctype_update():
+    add_revision_indexes("Commercial Offer")
+
 
 @frappe.whitelist()
+@instrument
 def make_sales_order(commercial_offer):
-    import frappe
-    from frappe.utils import flt
+    offer = frappe.get_doc("Commercial Offer", commercial_offer, for_update=True)
+    validate_no_sales_order(offer)
+    item_details = get_item_details_map(get_item_codes(offer.items))
+
+    so = build_sales_order(offer, {}, item_details)
+    so.insert()
+    link_sales_order(offer, so.name)
+    frappe.db.commit()
 
-    offer = frappe.get_doc("Commercial Offer", commercial_offer)
+    return so.name
 
+
+def validate_no_sales_order(offer):
+    if offer.sales_order:
+        frappe.throw(
+            _("Sales Order {0} already exists for Commercial Offer {1}").format(
+                frappe.bold(offer.sales_order), offer.name
+            )
+        )
+
+
+def link_sales_order(offer, sales_order):
+    """Mark offer as converted; its quantities stop counting against ATP"""
+    offer.db_set("sales_order", sales_order, update_modified=False)
+    invalidate_offer_stock_cache(offer)
+
+
+def release_sales_order(doc, method=None):
+    """Sales Order doc_events hook: reopen offers whose Sales Order is cancelled or deleted"""
+    for name in frappe.get_all("Commercial Offer", filters={"sales_order": doc.name}, pluck="name"):
+        link_sales_order(frappe.get_doc("Commercial Offer", name), None)
+
+
+def build_sales_order(offer, pricing_contexts, item_details):
+    """Return an unsaved Sales Order for offer
+
+    pricing_contexts caches get_pricing_context results per (price list,
+    company) across calls; item_details is from get_item_details_map.
+    """
     so = frappe.new_doc("Sales Order")
 
     # ------------------------
@@ -133,28 +168,61 @@ def make_sales_order(commercial_offer):
     if not so.selling_price_list:
         frappe.throw("Default Selling Price List is not set")
 
+    key = (so.selling_price_list, so.company)
+    if key not in pricing_contexts:
+        pricing_contexts[key] = get_pricing_context(*key)
+
+    context = pricing_contexts[key]
+    so.price_list_currency = context.price_list_currency
+    so.plc_conversion_rate = context.conversion_rate
+    so.conversion_rate = context.conversion_rate
+
+    # ------------------------
+    # ITEMS (LOCK RATE)
+    # ------------------------
+    for item in offer.items:
+        details = item_details.get(item.item_code) or {}
+        final_rate = flt(item.rate or 0) * (flt(item.discount or 0) + 100) / 100
+        so.append("items", {
+            "item_code": item.item_code,
+            "item_name": item.item_name or details.get("item_name"),
+            "uom": item.uom or details.get("stock_uom"),
+            "stock_uom": details.get("stock_uom"),
+            "qty": flt(item.qyt or 1),
+            "rate": final_rate,
+            "price_list_rate": final_rate,
+        })
+
+    # ------------------------
+    # FINALIZE
+    # ------------------------
+    so.set_missing_values(for_validate=False)
+    so.calculate_taxes_and_totals()
+
+    return so
+
+
+def get_pricing_context(price_list, company):
+    """Price list currency and its conversion rate to the company currency"""
     # Fetch price list currency
     price_list_currency = frappe.db.get_value(
         "Price List",
-        so.selling_price_list,
+        price_list,
         "currency"
     )
 
-    so.price_list_currency = price_list_currency
-
     # Company currency
     company_currency = frappe.get_cached_value(
-        "Company", so.company, "default_currency"
+        "Company", company, "default_currency"
     )
 
     # ------------------------
     # EXCHANGE RATE
     # ------------------------
     if price_list_currency == company_currency:
-        so.plc_conversion_rate = 1
-        so.conversion_rate = 1
+        conversion_rate = 1
     else:
-        so.plc_conversion_rate = flt(
+        conversion_rate = flt(
             frappe.get_value(
                 "Currency Exchange",
                 {
@@ -165,48 +233,132 @@ def make_sales_order(commercial_offer):
             )
         ) or 1
 
-        so.conversion_rate = so.plc_conversion_rate
+    return frappe._dict({
+        "price_list_currency": price_list_currency,
+        "company_currency": company_currency,
+        "conversion_rate": conversion_rate
+    })
 
-    # ------------------------
-    # ITEMS (LOCK RATE)
-    # ------------------------
-    for item in offer.items:
-        final_rate = flt(item.rate or 0) * (flt(item.discount or 0) + 100) / 100
-        so.append("items", {
-            "item_code": item.item_code,
-            "item_name": item.item_name,
-            "uom": item.uom,
-            "qty": flt(item.qyt or 1),
-            "rate": final_rate,
-            "price_list_rate": final_rate,
-            
-        })
 
-    # ------------------------
-    # FINALIZE
-    # ------------------------
-    so.set_missing_values(for_validate=False)
-    so.calculate_taxes_and_totals()
+def get_item_details_map(item_codes):
+    """Item master fields needed on Sales Order rows, for all item codes in one query"""
+    if not item_codes:
+        return {}
 
-    so.insert()
-    frappe.db.commit()
+    items = frappe.get_all(
+        "Item",
+        filters={"name": ["in", list(set(item_codes))]},
+        fields=["name", "item_name", "stock_uom"]
+    )
+
+    return {item.name: item for item in items}
+
+
+@frappe.whitelist()
+@instrument
+def make_sales_orders(offers):
+    """Queue Sales Order creation for several Commercial Offers, with progress reporting"""
+    offers = frappe.parse_json(offers) if isinstance(offers, str) else offers
+    offers = list(dict.fromkeys(filter(None, offers or [])))
+    if not offers:
+        frappe.throw(_("Select at least one Commercial Offer"))
 
-    return so.name       
+    for offer in offers:
+        frappe.has_permission("Commercial Offer", "read", offer, throw=True)
+    frappe.has_permission("Sales Order", "create", throw=True)
 
+    job = frappe.enqueue(
+        "boq.boq.doctype.commercial_offer.commercial_offer.process_sales_orders",
+        queue="long",
+        timeout=3600,
+        offers=offers
+    )
+
+    return {"job_id": job.id if job else None, "count": len(offers)}
+
+
+def process_sales_orders(offers):
+    """Background job of make_sales_orders: one Sales Order per offer, committed one by one"""
+    pricing_contexts = {}
+    item_details = get_item_details_map(
+        frappe.get_all(
+            "Purchase BOQ Item",
+            filters={"parenttype": "Commercial Offer", "parent": ["in", offers]},
+            pluck="item_code",
+            distinct=True
+        )
+    )
+
+    results = []
+    for count, name in enumerate(offers, start=1):
+        frappe.publish_progress(
+            count * 100 / len(offers),
+            title=_("Creating Sales Orders"),
+            description=_("{0} of {1}: {2}").format(count, len(offers), name)
+        )
+
+        try:
+            offer = frappe.get_doc("Commercial Offer", name, for_update=True)
+            # permissions may have changed since the job was queued
+            if not offer.has_permission("read"):
+                frappe.throw(
+                    _("Not permitted to read Commercial Offer {0}").format(name), frappe.PermissionError
+                )
+            if offer.docstatus != 1:
+                frappe.throw(_("Commercial Offer {0} is not submitted").format(name))
+            validate_no_sales_order(offer)
 
+            so = build_sales_order(offer, pricing_contexts, item_details)
+            so.insert()
+            link_sales_order(offer, so.name)
+            frappe.db.commit()
+
+            results.append({"commercial_offer": name, "sales_order": so.name})
+        except (frappe.ValidationError, frappe.PermissionError) as e:
+            # expected failures: report the message, nothing to log
+            frappe.db.rollback()
+            results.append({"commercial_offer": name, "error": str(e)})
+        except Exception:
+            frappe.db.rollback()
+            frappe.log_error(title=_("Sales Order creation failed for {0}").format(name))
+            results.append({
+                "commercial_offer": name,
+                "error": _("Unexpected error, see the Error Log")
+            })
+
+    frappe.publish_realtime("boq_sales_orders_created", {"results": results}, user=frappe.session.user)
+    return results
 
 
 @frappe.whitelist()
-def get_purchase_boq_data(purchase_boq):
-    """Fetch Purchase BOQ data with stock information"""
+@instrument
+def get_purchase_boq_data(purchase_boq, etag=None):
+    """Fetch Purchase BOQ data with stock information, cached per Purchase BOQ version"""
     if not purchase_boq:
         return None
+
+    return get_cached_payload(
+        "Purchase BOQ",
+        purchase_boq,
+        lambda: build_purchase_boq_data(purchase_boq),
+        etag=etag,
+        refresh=lambda payload: payload.update(
+            latest_revision=get_latest_revision("Purchase BOQ", purchase_boq)
+        )
+    )
+
+
+def build_purchase_boq_data(purchase_boq):
+    """Purchase BOQ items with stock, services, and party details"""
     
     doc = frappe.get_doc("Purchase BOQ", purchase_boq)
     
     items = []
     services = []
     
+    # Stock for every item of the BOQ, cached per item
+    stock_map = get_cached_stock_map(get_item_codes(doc.items))
+
     # Process items with stock data
     for src_item in doc.items or []:
         item = {
@@ -220,8 +372,7 @@ def get_purchase_boq_data(purchase_boq):
         
         # Get stock quantity
         if src_item.item_code:
-            stock_qty = get_item_stock(src_item.item_code)
-            item["current_stock"] = stock_qty
+            item["current_stock"] = stock_map.get(src_item.item_code, 0)
         
         items.append(item)
     
@@ -241,43 +392,12 @@ def get_purchase_boq_data(purchase_boq):
         "opportunity": doc.get("opportunity"),
         "opportunity_from": doc.get("opportunity_from"),
         "party": doc.get("party"),
+        "latest_revision": get_latest_revision("Purchase BOQ", purchase_boq),
         "items": items,
         "services": services
     }
 
 
-def get_item_stock(item_code):
-    """Get total stock for an item across all warehouses"""
-    bins = frappe.get_all(
-        "Bin",
-        filters={"item_code": item_code},
-        fields=["actual_qty"]
-    )
-    
-    total_stock = sum(bin.actual_qty or 0 for bin in bins)
-    return total_stock
-
-
-@frappe.whitelist()
 def validate_stock_availability(doc, method=None):
-    """Hook to validate stock before submission"""
-    if isinstance(doc, str):
-        doc = frappe.get_doc(frappe.parse_json(doc))
-    
-    low_stock_items = []
-    
-    for item in doc.items or []:
-        if item.current_stock < item.qyt:
-            low_stock_items.append({
-                "item_code": item.item_code,
-                "item_name": item.item_name,
-                "required": item.qyt,
-                "available": item.current_stock
-            })
-    
-    if low_stock_items:
-        message = _("Following items have insufficient stock:\n")
-        for item in low_stock_items:
-            message += f"\n• {item['item_name']}: Required {item['required']}, Available {item['available']}"
-        
-        frappe.msgprint(message, indicator="orange", title=_("Low Stock Warning"))
\ No newline at end of file
+    """Refresh live stock and warn about shortages (see boq.stock)"""
+    validate_live_stock(doc, method)
@@ -1,9 +1,39 @@
 # purchase_boq.py (Server-side)
 
 import frappe
-from frappe import _
 from frappe.model.document import Document
 
+from boq.boq.doctype.commercial_offer.commercial_offer import build_purchase_boq_data
+from boq.bulk import bulk_insert_children
+from boq.child_rows import load_first_page, set_lazy_rows_onload, validate_rows_loaded
+from boq.instrumentation import instrument
+from boq.rates import get_rate_map
+from boq.response_cache import get_cached_payload
+from boq.revision import (
+    add_revision_indexes,
+    allocate_revision,
+    get_latest_revision,
+    remove_from_revision_chain,
+    start_revision_chain,
+    validate_latest_revision,
+)
+from boq.stock import get_cached_stock_map, get_item_codes
+from boq.stock import validate_stock_availability as validate_live_stock
+from boq.totals import calculate_totals
+
+# Row fields set by the totals engine, mapped to computed columns
+ITEM_TOTAL_FIELDS = {
+    "amount": "amount",
+    "discount_amount": "discount_amount",
+    "final_amount": "final_amount"
+}
+SERVICE_TOTAL_FIELDS = {
+    "amount": "amount",
+    "discount_amount": "discount_amount",
+    "final_amount": "final_amount"
+}
+
+
 class PurchaseBOQ(Document):
     def autoname(self):
         if not self.sales_boq:
@@ -21,36 +51,18 @@ class PurchaseBOQ(Document):
             self.revision = 0
             self.previous_version = None
             self.is_latest = 1
+            start_revision_chain(self.doctype, base)
             return
 
         # ------------------------------------------------
         # CASE 2: CREATE REVISION (R1, R2, ...)
         # ------------------------------------------------
-        max_revision = frappe.db.get_value(
-            self.doctype,
-            {"base_document": self.base_document},
-            "MAX(revision)"
-        ) or 0
-
-        next_revision = max_revision + 1
+        revision = allocate_revision(self.doctype, self.base_document)
 
-        self.name = f"{self.base_document}-R{next_revision}"
-        self.revision = next_revision
+        self.name = revision.name
+        self.revision = revision.revision
+        self.previous_version = revision.previous_version
         self.is_latest = 1
-
-        self.previous_version = frappe.db.get_value(
-            self.doctype,
-            {"base_document": self.base_document, "revision": max_revision},
-            "name"
-        )
-
-        frappe.db.set_value(
-            self.doctype,
-            {"base_document": self.base_document},
-            "is_latest",
-            0,
-            update_modified=False
-        )
     # def autoname(self):
     #     """Generate name from Sales BOQ by replacing -S with -P"""
     #     if self.sales_boq:
@@ -61,66 +73,73 @@ class PurchaseBOQ(Document):
     
     def validate(self):
         """Calculate totals on save"""
-        self.calculate_item_totals()
-        self.calculate_service_totals()
-        self.calculate_grand_total()
-    
-    def calculate_item_totals(self):
-        """Calculate amounts for all items"""
-        item_total = 0
-        
-        for item in self.items:
-            qty = item.qyt or 0
-            rate = item.rate or 0
-            discount = item.discount or 0
-            
-            amount = qty * rate
-            discount_amount = amount * (discount / 100)
-            final_amount = amount + discount_amount
-            
-            item.amount = amount
-            item.discount_amount = discount_amount
-            item.final_amount = final_amount
-            
-            item_total += final_amount
-        
-        self.item_total = item_total
-    
-    def calculate_service_totals(self):
-        """Calculate amounts for all services"""
-        service_total = 0
-        
-        for service in self.services:
-            cost = service.service_cost or 0
-            discount = service.discount or 0
-            
-            discount_amount = cost * (discount / 100)
-            final_amount = cost + discount_amount
-            
-            service.amount = cost
-            service.discount_amount = discount_amount
-            service.final_amount = final_amount
-            
-            service_total += final_amount
-        
-        self.services_total = service_total
-    
-    def calculate_grand_total(self):
-        """Calculate grand total"""
-        self.grand_total = (self.item_total or 0) + (self.services_total or 0)
+        validate_rows_loaded(self)
+        validate_latest_revision(self, "sales_boq", "Technical Offer")
+        calculate_totals(self, ITEM_TOTAL_FIELDS, SERVICE_TOTAL_FIELDS)
+
+    def db_insert(self, *args, **kwargs):
+        """Insert the parent, then all child rows in chunked multi-row INSERTs"""
+        super().db_insert(*args, **kwargs)
+        bulk_insert_children(self)
+
+    def load_from_db(self):
+        """Forms of large documents read only the first page of item rows"""
+        if not load_first_page(self):
+            super().load_from_db()
+
+    def onload(self):
+        set_lazy_rows_onload(self)
+
+    def before_update_after_submit(self):
+        validate_rows_loaded(self)
+
+    def before_cancel(self):
+        validate_rows_loaded(self)
+
+    def on_trash(self):
+        remove_from_revision_chain(self)
+
+
+def on_doctype_update():
+    add_revision_indexes("Purchase BOQ")
 
 
 @frappe.whitelist()
-def get_sales_boq_data(sales_boq):
-    """Fetch Sales BOQ data with stock and rate information"""
+@instrument
+def get_sales_boq_data(sales_boq, price_list=None, rate_sources=None, etag=None):
+    """Fetch Sales BOQ data with stock and rate information, cached per Technical Offer version"""
     if not sales_boq:
         return None
+
+    return get_cached_payload(
+        "Technical Offer",
+        sales_boq,
+        lambda: build_sales_boq_data(sales_boq, price_list=price_list, rate_sources=rate_sources),
+        variant={"price_list": price_list, "rate_sources": rate_sources},
+        etag=etag,
+        refresh=lambda payload: payload.update(
+            latest_revision=get_latest_revision("Technical Offer", sales_boq)
+        )
+    )
+
+
+def build_sales_boq_data(sales_boq, price_list=None, rate_sources=None):
+    """Technical Offer items with stock and rates, services, and party details"""
     
     doc = frappe.get_doc("Technical Offer", sales_boq)
     
     items = []
     services = []
-    
+
+    # Stock and rates for every item of the offer, one query per lookup
+    item_codes = get_item_codes(doc.items)
+    stock_map = get_cached_stock_map(item_codes)
+    rate_map = get_rate_map(
+        item_codes,
+        price_list=price_list,
+        rate_sources=frappe.parse_json(rate_sources) if rate_sources else None
+    )
+
     # Process items with stock data and rates
     for src_item in doc.items or []:
         item = {
@@ -132,15 +151,12 @@ def get_sales_boq_data(sales_boq):
             "discount": 0
         }
         
-        # Get standard rate from Item master
+        # Get rate from the configured rate sources
         if src_item.item_code:
-            rate = get_item_rate(src_item.item_code)
+            rate = rate_map.get(src_item.item_code, 0)
             item["rate"] = rate
             item["amount"] = (src_item.qyt or 0) * rate
-            
-            # Get stock quantity
-            stock_qty = get_item_stock(src_item.item_code)
-            item["current_stock"] = stock_qty
+            item["current_stock"] = stock_map.get(src_item.item_code, 0)
         else:
             item["rate"] = 0
             item["amount"] = 0
@@ -161,55 +177,24 @@ def get_sales_boq_data(sales_boq):
         "opportunity": doc.get("opportunity"),
         "opportunity_from": doc.get("opportunity_from"),
         "party": doc.get("party"),
+        "latest_revision": get_latest_revision("Technical Offer", sales_boq),
         "items": items,
         "services": services
     }
 
 
-def get_item_rate(item_code):
-    """Get standard rate from Item master"""
-    item = frappe.get_value("Item", item_code, "standard_rate")
-    return item or 0
+def get_item_rate(item_code, price_list=None):
+    """Get rate for a single item from the configured rate sources"""
+    return get_rate_map([item_code], price_list=price_list).get(item_code, 0)
 
 
-def get_item_stock(item_code):
-    """Get total stock for an item across all warehouses"""
-    bins = frappe.get_all(
-        "Bin",
-        filters={"item_code": item_code},
-        fields=["actual_qty"]
-    )
-    
-    total_stock = sum(bin.actual_qty or 0 for bin in bins)
-    return total_stock
-
-
-@frappe.whitelist()
 def validate_stock_availability(doc, method=None):
-    """Hook to validate stock before submission"""
-    if isinstance(doc, str):
-        doc = frappe.get_doc(frappe.parse_json(doc))
-    
-    low_stock_items = []
-    
-    for item in doc.items or []:
-        if item.current_stock < item.qyt:
-            low_stock_items.append({
-                "item_code": item.item_code,
-                "item_name": item.item_name,
-                "required": item.qyt,
-                "available": item.current_stock
-            })
-    
-    if low_stock_items:
-        message = _("Following items have insufficient stock:\n")
-        for item in low_stock_items:
-            message += f"\n• {item['item_name']}: Required {item['required']}, Available {item['available']}"
-        
-        frappe.msgprint(message, indicator="orange", title=_("Low Stock Warning"))
+    """Refresh live stock and warn about shortages (see boq.stock)"""
+    validate_live_stock(doc, method)
 
 
 @frappe.whitelist()
+@instrument
 def check_final_boq_exists(purchase_boq):
     """Check if Final BOQ already exists for this Purchase BOQ"""
     existing = frappe.get_all(
@@ -221,4 +206,27 @@ def check_final_boq_exists(purchase_boq):
     
     if existing:
         return {"exists": True, "name": existing[0].name}
-    return {"exists": False}
\ No newline at end of file
+    return {"exists": False}
+
+
+@frappe.whitelist()
+@instrument
+def make_commercial_offer(purchase_boq):
+    """Create the Commercial Offer of a Purchase BOQ on the server, return its name"""
+    existing = check_final_boq_exists(purchase_boq)
+    if existing["exists"]:
+        return existing["name"]
+
+    # batched stock, then one insert with bulk-written child rows
+    data = build_purchase_boq_data(purchase_boq)
+
+    offer = frappe.new_doc("Commercial Offer")
+    offer.purchase_boq = purchase_boq
+    offer.opportunity = data.get("opportunity")
+    offer.opportunity_from = data.get("opportunity_from")
+    offer.party = data.get("party")
+    offer.set("items", data.get("items"))
+    offer.set("services", data.get("services"))
+    offer.insert()
+
+    return offer.name
@@ -1,9 +1,249 @@
 # Copyright (c) 2025, Som and Contributors
 # See license.txt
 
-# import frappe
+from decimal import Decimal
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
+from frappe.utils import get_datetime
+from werkzeug.datastructures import Headers
+from werkzeug.test import EnvironBuilder
+from werkzeug.wrappers import Request, Response
+
+from boq.api import get_warehouse_stock_pivot
+from boq.boq.doctype.boq_item_search_token.test_boq_item_search_token import make_item, make_item_group
+from boq.child_rows import DEFAULT_PAGE_LENGTH, LAZY_ROWS_THRESHOLD
+from boq.response_cache import get_cached_payload
+from boq.row_changes import apply_row_changes
+from boq.totals import compute_amounts
 
 
 class TestPurchaseBOQ(FrappeTestCase):
-	pass
+	def test_insert_writes_child_rows_once(self):
+		pb = make_purchase_boq([
+			{"tag_no": "A", "qyt": 1, "rate": 1},
+			{"tag_no": "B", "qyt": 2, "rate": 1},
+			{"tag_no": "C", "qyt": 3, "rate": 1},
+		], services=[{"service_cost": 10}, {"service_cost": 20}])
+
+		self.assertTrue(all(row.flags.bulk_inserted for row in pb.get_all_children()))
+		for fieldname, child_doctype in (("items", "Purchase BOQ Item"), ("services", "Purchase Services")):
+			saved = frappe.get_all(
+				child_doctype,
+				filters={"parent": pb.name, "parenttype": "Purchase BOQ", "parentfield": fieldname},
+				fields=["name", "idx"],
+				order_by="idx"
+			)
+			self.assertEqual(
+				[(row.name, row.idx) for row in saved],
+				[(row.name, row.idx) for row in pb.get(fieldname)]
+			)
+			self.assertEqual([row.idx for row in saved], list(range(1, len(pb.get(fieldname)) + 1)))
+
+	def test_amounts_round_half_up(self):
+		columns = compute_amounts([Decimal("0.125"), Decimal("2.675"), Decimal("1.005")], [0, 10, 0], 2)
+
+		# float round() gives 0.12, 2.67 and 1.0 here
+		self.assertEqual(columns["amount"], [Decimal("0.13"), Decimal("2.68"), Decimal("1.01")])
+		self.assertEqual(columns["discount_amount"], [Decimal("0.00"), Decimal("0.27"), Decimal("0.00")])
+		self.assertEqual(columns["final_amount"], [Decimal("0.13"), Decimal("2.95"), Decimal("1.01")])
+
+	def test_totals(self):
+		pb = make_purchase_boq([
+			{"tag_no": "A", "qyt": 2, "rate": 10},
+			{"tag_no": "B", "qyt": 1, "rate": 5, "discount": 10},
+		], services=[{"service_cost": 100, "discount": 5}])
+
+		self.assertEqual(pb.item_total, 25.5)
+		self.assertEqual(pb.services_total, 105)
+		self.assertEqual(pb.grand_total, 130.5)
+
+		pb.items[0].rate = 20
+		pb.remove(pb.items[1])
+		pb.append("items", {"tag_no": "C", "qyt": 3, "rate": 1})
+		pb.save()
+
+		self.assertEqual(pb.item_total, 43)
+		self.assertEqual(pb.grand_total, 148)
+
+	def test_incremental_totals_and_check_mode(self):
+		pb = make_purchase_boq([
+			{"tag_no": "A", "qyt": 2, "rate": 10},
+			{"tag_no": "B", "qyt": 1, "rate": 5},
+		])
+
+		# the saved total is adjusted by the changed row only, so a wrong saved total stays wrong
+		pb.db_set("item_total", 100, update_modified=False)
+		pb.reload()
+		pb.items[0].qyt = 3
+		pb.save()
+		self.assertEqual(pb.item_total, 110)
+
+		# check mode compares with a full recompute, logs the mismatch and fixes the total
+		errors = frappe.db.count("Error Log", {"method": "BOQ totals mismatch"})
+		pb.items[0].qyt = 4
+		pb.flags.check_totals = True
+		pb.save()
+
+		self.assertEqual(pb.item_total, 45)
+		self.assertEqual(frappe.db.count("Error Log", {"method": "BOQ totals mismatch"}), errors + 1)
+
+	def test_apply_row_changes(self):
+		pb = make_purchase_boq([
+			{"tag_no": "A", "qyt": 2, "rate": 10},
+			{"tag_no": "B", "qyt": 1, "rate": 5},
+		])
+		row_a, row_b = (row.name for row in pb.items)
+
+		result = apply_row_changes("Purchase BOQ", pb.name, pb.modified, {
+			"items": {
+				"updated": [{"name": row_a, "qyt": "3"}],
+				"added": [{"tag_no": "C", "qyt": 1, "rate": 7}],
+				"removed": [row_b],
+			}
+		})
+
+		self.assertEqual(result["totals"]["item_total"], 37)
+		self.assertEqual(result["totals"]["grand_total"], 37)
+
+		pb.reload()
+		self.assertEqual([row.tag_no for row in pb.items], ["A", "C"])
+		self.assertEqual(pb.items[0].qyt, 3)
+		self.assertEqual(pb.items[0].final_amount, 30)
+		self.assertEqual(pb.items[1].name, result["added"]["items"][0])
+		self.assertEqual(pb.item_total, 37)
+		self.assertEqual(get_datetime(pb.modified), get_datetime(result["modified"]))
+
+	def test_apply_row_changes_rejects_invalid_changes(self):
+		pb = make_purchase_boq([{"tag_no": "A", "qyt": 2, "rate": 10}])
+		row_a = pb.items[0].name
+
+		self.assertRaises(
+			frappe.TimestampMismatchError,
+			apply_row_changes, "Purchase BOQ", pb.name, "2000-01-01 00:00:00",
+			{"items": {"updated": [{"name": row_a, "qyt": 1}]}}
+		)
+
+		for changes in (
+			{"updated": [{"qyt": 1}]},
+			{"updated": [{"name": "not-a-row", "qyt": 1}]},
+			{"updated": [{"name": row_a, "qyt": 1}], "removed": [row_a]},
+		):
+			self.assertRaises(
+				frappe.ValidationError,
+				apply_row_changes, "Purchase BOQ", pb.name, pb.modified, {"items": changes}
+			)
+
+		self.assertEqual(frappe.db.get_value("Purchase BOQ", pb.name, "item_total"), 20)
+
+	def test_cached_payload_etag(self):
+		pb = make_purchase_boq([{"tag_no": "A", "qyt": 2, "rate": 10}])
+		variant = {"test": frappe.generate_hash()}
+		self.addCleanup(clear_request)
+
+		set_request()
+		payload = get_cached_payload("Purchase BOQ", pb.name, lambda: {"items": []}, variant=variant)
+		etag = payload["etag"]
+		self.assertEqual(frappe.local.response_headers["ETag"], f'"{etag}"')
+
+		set_request({"If-None-Match": f'"other", W/"{etag}"'})
+		response = get_cached_payload("Purchase BOQ", pb.name, lambda: {"items": []}, variant=variant)
+		self.assertIsInstance(response, Response)
+		self.assertEqual(response.status_code, 304)
+		self.assertEqual(response.get_data(), b"")
+		self.assertEqual(response.headers["ETag"], f'"{etag}"')
+
+		set_request()
+		self.assertEqual(
+			get_cached_payload("Purchase BOQ", pb.name, lambda: {"items": []}, variant=variant, etag=etag),
+			{"not_modified": 1, "etag": etag}
+		)
+
+	def test_form_load_reads_first_page(self):
+		pb = make_purchase_boq([
+			{"tag_no": str(i), "qyt": 1, "rate": 1} for i in range(LAZY_ROWS_THRESHOLD + 1)
+		])
+
+		frappe.flags.boq_lazy_load = ("Purchase BOQ", pb.name)
+		self.addCleanup(frappe.flags.pop, "boq_lazy_load", None)
+		doc = frappe.get_doc("Purchase BOQ", pb.name)
+
+		self.assertEqual(len(doc.items), DEFAULT_PAGE_LENGTH)
+		self.assertEqual([row.idx for row in doc.items], list(range(1, DEFAULT_PAGE_LENGTH + 1)))
+		self.assertEqual(doc.item_total, pb.item_total)
+		self.assertEqual(doc.flags.lazy_rows_total, LAZY_ROWS_THRESHOLD + 1)
+
+		doc.run_method("onload")
+		lazy = doc.get_onload().boq_lazy_rows
+		self.assertEqual(lazy["total"], LAZY_ROWS_THRESHOLD + 1)
+		self.assertEqual(set(lazy["live_values"]), {row.name for row in doc.items})
+
+		self.assertRaises(frappe.ValidationError, doc.save)
+
+		# only the marked load is paged
+		self.assertEqual(len(frappe.get_doc("Purchase BOQ", pb.name).items), LAZY_ROWS_THRESHOLD + 1)
+
+
+	def test_warehouse_stock_pivot(self):
+		group = make_item_group(f"_Test BOQ Pivot {frappe.generate_hash(length=6)}")
+		item_a, item_b, no_bin = (make_item(name, group) for name in ("Pivot A", "Pivot B", "Pivot C"))
+		company = frappe.db.get_value("Company", {}, "name")
+		wh_1, wh_2 = sorted(
+			frappe.get_doc({"doctype": "Warehouse", "warehouse_name": f"_Test BOQ {suffix}", "company": company}).insert().name
+			for suffix in (frappe.generate_hash(length=6), frappe.generate_hash(length=6))
+		)
+		for item_code, warehouse, qty in ((item_a, wh_1, 5), (item_a, wh_2, 3), (item_b, wh_2, 2)):
+			frappe.get_doc({"doctype": "Bin", "item_code": item_code, "warehouse": warehouse, "actual_qty": qty}).insert()
+
+		pb = make_purchase_boq([
+			{"tag_no": "C", "item_code": no_bin, "qyt": 1, "rate": 1},
+			{"tag_no": "A", "item_code": item_a, "qyt": 1, "rate": 1},
+			{"tag_no": "B", "item_code": item_b, "qyt": 1, "rate": 1},
+			{"tag_no": "A2", "item_code": item_a, "qyt": 1, "rate": 1},
+		])
+
+		self.assertEqual(get_warehouse_stock_pivot("Purchase BOQ", pb.name), {
+			"items": [no_bin, item_a, item_b],
+			"warehouses": [wh_1, wh_2],
+			"qty": [[0, 0], [5, 3], [0, 2]],
+			"total": [0, 8, 2],
+		})
+		self.assertEqual(get_warehouse_stock_pivot("Purchase BOQ", pb.name, warehouses=wh_2), {
+			"items": [no_bin, item_a, item_b],
+			"warehouses": [wh_2],
+			"qty": [[0], [3], [2]],
+			"total": [0, 3, 2],
+		})
+
+
+def make_purchase_boq(items, services=None):
+	"""Insert a Technical Offer and its draft Purchase BOQ with the given rows"""
+	technical_offer = frappe.get_doc({"doctype": "Technical Offer", "party": "_Test BOQ"}).insert()
+
+	return frappe.get_doc({
+		"doctype": "Purchase BOQ",
+		"sales_boq": technical_offer.name,
+		"items": items,
+		"services": services or [],
+	}).insert()
+
+
+def make_revision(doc, items=None):
+	"""Insert the next revision of doc, optionally with other item rows"""
+	revision = frappe.copy_doc(doc)
+	revision.previous_version = doc.name
+	revision.base_document = doc.base_document
+	if items is not None:
+		revision.set("items", items)
+
+	return revision.insert()
+
+
+def set_request(headers=None):
+	"""Make the following calls see an HTTP request with headers"""
+	frappe.local.request = Request(EnvironBuilder(headers=headers).get_environ())
+	frappe.local.response_headers = Headers()
+
+
+def clear_request():
+	frappe.local.request = None
@@ -6,4 +6,9 @@ from frappe.model.document import Document
 
 
 class PurchaseServices(Document):
-	pass
+	def db_insert(self, *args, **kwargs):
+		# already written by the parent's bulk insert (boq.bulk.bulk_insert_children)
+		if self.flags.bulk_inserted:
+			return
+
+		return super().db_insert(*args, **kwargs)
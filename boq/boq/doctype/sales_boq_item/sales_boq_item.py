@@ -1,10 +1,104 @@
 # Copyright (c) 2025, Som and contributors
 # For license information, please see license.txt
 
-# import frappe
+from bisect import bisect_left
+
+import frappe
 from frappe.model.document import Document
+from frappe.utils import cint
+from frappe.utils.nestedset import get_ancestors_of
+
+from boq.item_search import get_item_groups, get_matching_items
+
+# Redis hash of item_group -> [(name, item_name), ...] of the group and its
+# descendants, sorted by name
+ITEM_GROUP_CACHE_KEY = "boq_item_group_items"
+
+# Upper bound on rows returned to the item_code link field
+MAX_RESULTS = 50
+
 
 class SalesBOQItem(Document):
 	pass
 
 
+@frappe.whitelist()
+@frappe.validate_and_sanitize_search_inputs
+def get_filtered_items(doctype, txt, searchfield, start, page_len, filters):
+	"""Link query for item_code, scoped to the row's item_category"""
+	page_len = min(cint(page_len) or MAX_RESULTS, MAX_RESULTS)
+	start = cint(start)
+	item_category = (filters or {}).get("item_category")
+
+	if not item_category:
+		names = get_matching_items({}, start=start, page_length=page_len, txt=txt)
+		item_names = dict(frappe.get_all("Item", filters={"name": ["in", names]}, fields=["name", "item_name"], as_list=True)) if names else {}
+		return [(name, item_names.get(name)) for name in names]
+
+	return match_items(get_item_group_items(item_category), txt, start, page_len)
+
+
+def match_items(items, txt, start, page_len):
+	"""Items whose code or name starts with txt: code matches first, then name matches"""
+	txt = (txt or "").strip().lower()
+	if not txt:
+		return items[start:start + page_len]
+
+	limit = start + page_len
+	codes = [name.lower() for name, _item_name in items]
+
+	matched = []
+	seen = set()
+	i = bisect_left(codes, txt)
+	while i < len(items) and codes[i].startswith(txt) and len(matched) < limit:
+		matched.append(items[i])
+		seen.add(items[i][0])
+		i += 1
+
+	for name, item_name in items:
+		if len(matched) >= limit:
+			break
+		if name not in seen and (item_name or "").lower().startswith(txt):
+			matched.append((name, item_name))
+
+	return matched[start:limit]
+
+
+def get_item_group_items(item_group):
+	"""Enabled items of an item group and its descendants, cached until one of them changes"""
+	return frappe.cache().hget(
+		ITEM_GROUP_CACHE_KEY,
+		item_group,
+		generator=lambda: sorted(
+			(tuple(row) for row in frappe.get_all(
+				"Item",
+				filters={"item_group": ["in", get_item_groups(item_group)], "disabled": 0},
+				fields=["name", "item_name"],
+				as_list=True
+			)),
+			key=lambda row: row[0].lower()
+		)
+	)
+
+
+def clear_item_group_cache(doc, method=None, *args, **kwargs):
+	"""Item doc_events hook: drop cached lists of the item's old and new item group and their ancestors"""
+	before = doc.get_doc_before_save() if method == "on_update" else None
+	if (
+		method == "on_update"
+		and before
+		and all(before.get(f) == doc.get(f) for f in ("item_group", "item_name", "disabled"))
+	):
+		return
+
+	item_groups = set()
+	for item_group in filter(None, {doc.get("item_group"), before.get("item_group") if before else None}):
+		item_groups.update([item_group, *get_ancestors_of("Item Group", item_group)])
+
+	if item_groups:
+		frappe.cache().hdel(ITEM_GROUP_CACHE_KEY, list(item_groups))
+
+
+def clear_item_group_tree_cache(doc, method=None, *args, **kwargs):
+	"""Item Group doc_events hook: the tree changed, so any cached list may be stale"""
+	frappe.cache().delete_value(ITEM_GROUP_CACHE_KEY)
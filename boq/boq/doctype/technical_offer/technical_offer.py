@@ -2,7 +2,20 @@
 
 import frappe
 from frappe import _
+from frappe.model import data_fieldtypes
 from frappe.model.document import Document
+from frappe.utils import cint
+
+from boq.boq.doctype.purchase_boq.purchase_boq import build_sales_boq_data
+from boq.bulk import copy_child_rows
+from boq.child_rows import load_first_page, set_lazy_rows_onload, validate_rows_loaded
+from boq.instrumentation import instrument
+from boq.revision import (
+    add_revision_indexes,
+    allocate_revision,
+    remove_from_revision_chain,
+    start_revision_chain,
+)
 
 # class TechnicalOffer(Document):
 #     def autoname(self):
@@ -36,6 +49,10 @@ from frappe.model.document import Document
 #     #     self.is_latest = 1
 
 
+# Offers with more child rows than this are revised with the SQL fast path
+FAST_REVISION_THRESHOLD = 200
+
+
 class TechnicalOffer(Document):
 
     def autoname(self):
@@ -53,53 +70,65 @@ class TechnicalOffer(Document):
             self.revision = 0
             self.previous_version = None
             self.is_latest = 1
+            start_revision_chain(self.doctype, base)
             return
 
         # ------------------------------------------------
-        # CASE 2: FIRST REVISION (R1)
+        # CASE 2: NEXT REVISIONS (R1, R2, ...)
         # ------------------------------------------------
-        if not self.previous_version and self.base_document:
-            base = frappe.get_doc(self.doctype, self.base_document)
+        base_document = self.base_document or frappe.db.get_value(
+            self.doctype,
+            self.previous_version,
+            "base_document"
+        )
+        revision = allocate_revision(self.doctype, base_document)
 
-            self.revision = base.revision + 1
-            self.name = f"{self.base_document}-R{self.revision}"
-            self.previous_version = base.name
-            self.is_latest = 1
+        self.base_document = base_document
+        self.revision = revision.revision
+        self.name = revision.name
+        self.previous_version = revision.previous_version
+        self.is_latest = 1
 
-            frappe.db.set_value(
-                self.doctype,
-                base.name,
-                "is_latest",
-                0
-            )
-            return
+    def validate(self):
+        validate_rows_loaded(self)
 
-        # ------------------------------------------------
-        # CASE 3: NEXT REVISIONS (R2, R3, ...)
-        # ------------------------------------------------
-        prev = frappe.get_doc(self.doctype, self.previous_version)
+    def load_from_db(self):
+        """Forms of large documents read only the first page of item rows"""
+        if not load_first_page(self):
+            super().load_from_db()
 
-        self.revision = prev.revision + 1
-        self.base_document = prev.base_document
-        self.name = f"{self.base_document}-R{self.revision}"
-        self.is_latest = 1
+    def onload(self):
+        set_lazy_rows_onload(self)
 
-        frappe.db.set_value(
-            self.doctype,
-            prev.name,
-            "is_latest",
-            0
-        )
+    def before_update_after_submit(self):
+        validate_rows_loaded(self)
 
-@frappe.whitelist()
-def create_new_revision(docname):
-    old = frappe.get_doc("Technical Offer", docname)
+    def before_cancel(self):
+        validate_rows_loaded(self)
 
-    if not old.is_latest:
+    def on_trash(self):
+        remove_from_revision_chain(self)
+
+
+def on_doctype_update():
+    add_revision_indexes("Technical Offer")
+
+
+@frappe.whitelist()
+@instrument
+def create_new_revision(docname, fast=None):
+    if not frappe.db.get_value("Technical Offer", docname, "is_latest"):
         frappe.throw(_("Only latest revision can be revised"))
-        
-    old.db_set("is_latest", 0)
 
+    if fast is None:
+        fast = get_child_row_count("Technical Offer", docname) > FAST_REVISION_THRESHOLD
+
+    if cint(fast):
+        return create_revision_fast(docname)
+
+    old = frappe.get_doc("Technical Offer", docname)
+
+    # autoname allocates the revision and retires the old latest row
     new = frappe.copy_doc(old)
     new.previous_version = old.name
     new.docstatus = 0
@@ -109,37 +138,106 @@ def create_new_revision(docname):
 
     return new.name
 
-# @frappe.whitelist()
-# def get_short_forms_data(field_type):
-#     """Fetch all short forms for MOC or Make"""
-    
-#     # Get all Short Forms parent documents
-#     parents = frappe.get_all(
-#         "Short Forms",
-#         filters={"field_name": field_type},
-#         fields=["name"],
-#         limit_page_length=500
-#     )
-    
-#     if not parents:
-#         return []
-    
-#     collected = []
-    
-#     # Get child table data from each parent
-#     for parent in parents:
-#         doc = frappe.get_doc("Short Forms", parent.name)
-        
-#         # Loop through all fields in the document
-#         for key, value in doc.as_dict().items():
-#             if isinstance(value, list):
-#                 # It's a child table
-#                 for row in value:
-#                     if isinstance(row, dict) and row.get("name1"):
-#                         collected.append(row.get("name1"))
-    
-#     # Return unique sorted list
-#     return sorted(list(set(collected)))
+
+def create_revision_fast(docname):
+    """Revise without loading child rows: insert the parent, then copy rows in SQL"""
+    meta = frappe.get_meta("Technical Offer")
+    old = frappe.db.get_value("Technical Offer", docname, "*", as_dict=True)
+
+    new = frappe.new_doc("Technical Offer")
+    for df in meta.fields:
+        if df.fieldtype in data_fieldtypes and not df.no_copy:
+            new.set(df.fieldname, old.get(df.fieldname))
+
+    new.previous_version = old.name
+    new.docstatus = 0
+    new.amended_from = None
+
+    # only the parent is validated; child rows are cloned as-is
+    new.insert(ignore_permissions=True)
+    copy_child_rows("Technical Offer", old.name, new.name)
+
+    return new.name
+
+
+def get_child_row_count(doctype, name):
+    """Number of child rows across all tables of a document"""
+    return sum(
+        frappe.db.count(df.options, {"parent": name, "parenttype": doctype, "parentfield": df.fieldname})
+        for df in frappe.get_meta(doctype).get_table_fields()
+    )
+
+@frappe.whitelist()
+@instrument
+def make_purchase_boq(technical_offer):
+    """Create the Purchase BOQ of a submitted Technical Offer on the server, return its name"""
+    existing = frappe.db.get_value("Purchase BOQ", {"sales_boq": technical_offer}, "name")
+    if existing:
+        return existing
+
+    if frappe.db.get_value("Technical Offer", technical_offer, "docstatus") != 1:
+        frappe.throw(_("Technical Offer {0} must be submitted first").format(technical_offer))
+
+    # batched stock and rates, then one insert with bulk-written child rows
+    data = build_sales_boq_data(technical_offer)
+
+    purchase_boq = frappe.new_doc("Purchase BOQ")
+    purchase_boq.sales_boq = technical_offer
+    purchase_boq.opportunity = data.get("opportunity")
+    purchase_boq.opportunity_from = data.get("opportunity_from")
+    purchase_boq.party = data.get("party")
+    purchase_boq.set("items", data.get("items"))
+    purchase_boq.set("services", data.get("services"))
+    purchase_boq.insert()
+
+    return purchase_boq.name
+
+SHORT_FORMS_CACHE_KEY = "boq_short_forms"
+
+
+@frappe.whitelist()
+@instrument
+def get_short_forms_data(field_type):
+    """Sorted unique short forms (e.g. MOC or Make), cached per field type"""
+    return frappe.cache().hget(
+        SHORT_FORMS_CACHE_KEY,
+        field_type,
+        generator=lambda: _get_short_forms(field_type)
+    )
+
+
+def _get_short_forms(field_type):
+    # one query over every child table of Short Forms instead of a get_doc per parent
+    meta = frappe.get_meta("Short Forms")
+    tables = [
+        df.options for df in meta.get_table_fields()
+        if frappe.get_meta(df.options).has_field("name1")
+    ]
+    if not tables:
+        return []
+
+    query = " UNION ".join(
+        f"""
+        SELECT child.name1
+        FROM `tab{table}` child
+        INNER JOIN `tabShort Forms` parent ON parent.name = child.parent
+        WHERE parent.field_name = %(field_type)s
+            AND child.parenttype = 'Short Forms'
+            AND IFNULL(child.name1, '') != ''
+        """
+        for table in dict.fromkeys(tables)
+    )
+
+    return sorted(frappe.db.sql_list(query, {"field_type": field_type}))
+
+
+def clear_short_forms_cache(doc, method=None):
+    """Short Forms doc_events hook"""
+    frappe.cache().hdel(SHORT_FORMS_CACHE_KEY, doc.get("field_name"))
+
+    before = doc.get_doc_before_save()
+    if before and before.get("field_name") != doc.get("field_name"):
+        frappe.cache().hdel(SHORT_FORMS_CACHE_KEY, before.get("field_name"))
 
 
 # @frappe.whitelist()
@@ -1,9 +1,141 @@
 # Copyright (c) 2025, Som and Contributors
 # See license.txt
 
-# import frappe
+from unittest.mock import patch
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from boq.boq.doctype.boq_item_search_token.test_boq_item_search_token import make_item, make_item_group
+from boq.boq.doctype.technical_offer.technical_offer import create_new_revision
+from boq.bulk import COPY_OVERRIDE_COLUMNS
+from boq.importer import _run_import
+
 
 class TestTechnicalOffer(FrappeTestCase):
-	pass
+	def test_fast_revision_matches_copy_doc(self):
+		base = frappe.get_doc({
+			"doctype": "Technical Offer",
+			"party": "_Test BOQ",
+			"items": [{"item_name": f"Item {i}", "qyt": i} for i in range(1, 6)],
+			"services": [{"service_name": "Erection", "description": "<p>On site</p>"}],
+		}).insert()
+
+		# revising copies the latest revision, so slow copies base and fast copies slow
+		slow = create_new_revision(base.name, fast=0)
+		fast = create_new_revision(slow, fast=1)
+
+		names = set()
+		row_count = 0
+		for df in frappe.get_meta("Technical Offer").get_table_fields():
+			slow_rows = get_rows(df, slow)
+			fast_rows = get_rows(df, fast)
+
+			self.assertEqual(len(fast_rows), len(get_rows(df, base.name)))
+			self.assertEqual(len(fast_rows), len(slow_rows))
+			self.assertEqual([row.idx for row in fast_rows], list(range(1, len(slow_rows) + 1)))
+
+			for slow_row, fast_row in zip(slow_rows, fast_rows, strict=True):
+				self.assertEqual(
+					(fast_row.parent, fast_row.parenttype, fast_row.parentfield, fast_row.docstatus),
+					(fast, "Technical Offer", df.fieldname, 0)
+				)
+				self.assertEqual(strip_row(fast_row), strip_row(slow_row))
+
+			rows = get_rows(df, base.name) + slow_rows + fast_rows
+			names.update(row.name for row in rows)
+			row_count += len(rows)
+
+		self.assertEqual(len(names), row_count)
+
+	def test_import_items(self):
+		target = self.make_import_target()
+		item_a, item_b = target.items
+		file_url = make_csv_file([
+			["Item", "Quantity", "Item Group", "UOM"],
+			[item_a, "4", "", ""],
+			[item_b, "", target.group, "Nos"],
+			[item_a, "2.5", "", ""],
+		])
+
+		result = _run_import(target.offer, file_url, "Administrator")
+
+		self.assertEqual((result["inserted"], result["error_count"]), (3, 0))
+		rows = frappe.get_doc("Technical Offer", target.offer).items
+		# imported rows continue after the existing ones
+		self.assertEqual([row.idx for row in rows], [1, 2, 3, 4, 5])
+		self.assertEqual(
+			[(row.item_code, row.qyt, row.item_category, row.uom) for row in rows[2:]],
+			[
+				(item_a, 4, target.group, "Nos"),
+				(item_b, 1, target.group, "Nos"),
+				(item_a, 2.5, target.group, "Nos"),
+			]
+		)
+
+	def test_failed_import_writes_nothing(self):
+		target = self.make_import_target()
+		item_a, item_b = target.items
+		file_url = make_csv_file([
+			["item_code", "qty"],
+			*([item_a, "1"] for _i in range(4)),
+			["_Test BOQ missing item", "1"],
+			[item_b, "0"],
+		])
+
+		# chunks of two: rows 2 to 5 are written before the bad rows are read
+		with patch("boq.importer.IMPORT_CHUNK_SIZE", 2):
+			result = _run_import(target.offer, file_url, "Administrator")
+
+		self.assertEqual((result["inserted"], result["error_count"]), (0, 2))
+		self.assertEqual([error.split(":")[0] for error in result["errors"]], ["Row 6", "Row 7"])
+		self.assertEqual(len(frappe.get_doc("Technical Offer", target.offer).items), 2)
+
+	def make_import_target(self):
+		"""Technical Offer with two rows, and two Items; committed, since the import commits"""
+		group = make_item_group(f"_Test BOQ Import {frappe.generate_hash(length=6)}")
+		items = [make_item("Import A", group), make_item("Import B", group)]
+		offer = frappe.get_doc({
+			"doctype": "Technical Offer",
+			"party": "_Test BOQ",
+			"items": [{"item_name": "Existing", "qyt": 1}, {"item_name": "Existing", "qyt": 2}],
+		}).insert().name
+		frappe.db.commit()
+
+		def cleanup():
+			frappe.db.rollback()
+			frappe.delete_doc("Technical Offer", offer, force=True)
+			for item in items:
+				frappe.delete_doc("Item", item, force=True)
+			frappe.delete_doc("Item Group", group, force=True)
+			frappe.db.commit()
+
+		self.addCleanup(cleanup)
+		return frappe._dict({"offer": offer, "items": items, "group": group})
+
+def get_rows(table_df, parent):
+	return frappe.get_all(
+		table_df.options,
+		filters={"parent": parent, "parenttype": "Technical Offer", "parentfield": table_df.fieldname},
+		fields=["*"],
+		order_by="idx"
+	)
+
+
+def strip_row(row):
+	"""Row values that a copy must carry over unchanged"""
+	return {key: value for key, value in row.items() if key not in COPY_OVERRIDE_COLUMNS}
+
+
+def make_csv_file(rows):
+	"""Upload rows as a private CSV file and return its file_url"""
+	content = "\n".join(",".join(f'"{value}"' for value in row) for row in rows)
+	file_doc = frappe.get_doc({
+		"doctype": "File",
+		"file_name": f"boq_import_{frappe.generate_hash(length=6)}.csv",
+		"content": content,
+		"is_private": 1,
+	}).insert()
+	frappe.db.commit()
+
+	return file_doc.file_url
@@ -0,0 +1,14 @@
+// Copyright (c) 2026, Som and contributors
+// For license information, please see license.txt
+
+frappe.query_reports["BOQ API Performance"] = {
+	filters: [],
+
+	onload(report) {
+		report.page.add_inner_button(__("Clear Samples"), () => {
+			frappe.confirm(__("Drop all recorded samples?"), () => {
+				frappe.call("boq.instrumentation.clear_stats").then(() => report.refresh());
+			});
+		});
+	},
+};
@@ -0,0 +1,33 @@
+# Copyright (c) 2026, Som and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+
+from boq.instrumentation import get_stats, is_enabled
+
+
+def execute(filters=None):
+    if not is_enabled():
+        frappe.msgprint(
+            _("Set boq_instrumentation in site_config.json to record new samples"),
+            indicator="orange",
+            alert=True
+        )
+
+    return get_columns(), get_stats()
+
+
+def get_columns():
+    return [
+        {"fieldname": "method", "label": _("Method"), "fieldtype": "Data", "width": 420},
+        {"fieldname": "calls", "label": _("Calls"), "fieldtype": "Int", "width": 80},
+        {"fieldname": "p50_ms", "label": _("p50 (ms)"), "fieldtype": "Float", "width": 100},
+        {"fieldname": "p95_ms", "label": _("p95 (ms)"), "fieldtype": "Float", "width": 100},
+        {"fieldname": "p99_ms", "label": _("p99 (ms)"), "fieldtype": "Float", "width": 100},
+        {"fieldname": "max_ms", "label": _("Max (ms)"), "fieldtype": "Float", "width": 100},
+        {"fieldname": "avg_queries", "label": _("Avg Queries"), "fieldtype": "Float", "width": 110},
+        {"fieldname": "max_queries", "label": _("Max Queries"), "fieldtype": "Int", "width": 110},
+        {"fieldname": "avg_rows", "label": _("Avg Rows"), "fieldtype": "Float", "width": 100},
+        {"fieldname": "avg_payload_kb", "label": _("Avg Payload (KB)"), "fieldtype": "Float", "width": 130},
+    ]
@@ -0,0 +1,88 @@
+# Copyright (c) 2026, Som and contributors
+# For license information, please see license.txt
+
+# bulk.py (Server-side)
+#
+# Set-based writes for BOQ child tables, used where going through the ORM
+# row by row is too slow for documents with thousands of lines.
+
+import frappe
+from frappe.utils import now
+
+# Child rows are written in multi-row INSERTs of this many rows
+BULK_INSERT_CHUNK_SIZE = 500
+
+# Columns the copy sets itself instead of taking them from the source rows
+COPY_OVERRIDE_COLUMNS = ("name", "creation", "modified", "modified_by", "owner", "docstatus", "parent")
+
+
+def copy_child_rows(parent_doctype, source, target):
+    """Clone every child row of source under target with INSERT ... SELECT
+
+    New row names are derived from the target and the source row name, so
+    the copy is one statement per child table regardless of row count.
+    """
+    values = {
+        "source": source,
+        "target": target,
+        "parenttype": parent_doctype,
+        "now": now(),
+        "user": frappe.session.user
+    }
+
+    for df in frappe.get_meta(parent_doctype).get_table_fields():
+        child_meta = frappe.get_meta(df.options)
+        no_copy = {field.fieldname for field in child_meta.fields if field.no_copy}
+        columns = [
+            column for column in child_meta.get_valid_columns()
+            if column not in COPY_OVERRIDE_COLUMNS and column not in no_copy
+        ]
+
+        frappe.db.sql(
+            """
+            INSERT INTO `tab{child_doctype}` ({target_columns})
+            SELECT
+                SUBSTR(MD5(CONCAT(%(target)s, name)), 1, 10),
+                %(now)s, %(now)s, %(user)s, %(user)s, 0, %(target)s,
+                {source_columns}
+            FROM `tab{child_doctype}`
+            WHERE parent = %(source)s
+                AND parenttype = %(parenttype)s
+                AND parentfield = %(parentfield)s
+            """.format(
+                child_doctype=df.options,
+                target_columns=", ".join(f"`{column}`" for column in COPY_OVERRIDE_COLUMNS + tuple(columns)),
+                source_columns=", ".join(f"`{column}`" for column in columns)
+            ),
+            {**values, "parentfield": df.fieldname}
+        )
+
+
+def bulk_insert_children(doc, chunk_size=BULK_INSERT_CHUNK_SIZE):
+    """Write all child rows of a document being inserted in chunked multi-row INSERTs
+
+    Call from the parent's db_insert, i.e. after the whole document has been
+    named and validated. Written rows are flagged so their own db_insert,
+    which Document.insert still calls row by row, skips them.
+    """
+    rows_by_doctype = {}
+    for row in doc.get_all_children():
+        rows_by_doctype.setdefault(row.doctype, []).append(row)
+
+    for child_doctype, rows in rows_by_doctype.items():
+        row_dicts = [
+            row.get_valid_dict(convert_dates_to_str=True, ignore_virtual=True)
+            for row in rows
+        ]
+        fields = list(row_dicts[0])
+
+        frappe.db.bulk_insert(
+            child_doctype,
+            fields,
+            [[row_dict.get(field) for field in fields] for row_dict in row_dicts],
+            chunk_size=chunk_size
+        )
+
+        for row in rows:
+            row.flags.bulk_inserted = True
+            row.set("__islocal", False)
@@ -0,0 +1,179 @@
+# Copyright (c) 2026, Som and contributors
+# For license information, please see license.txt
+
+# child_rows.py (Server-side)
+#
+# Paged loading of BOQ child rows. When the form opens a document with many
+# item rows, getdoc (overridden in hooks.py) marks it and the controller's
+# load_from_db reads the parent, its other tables and only the first page of
+# item rows. The form script (public/js/lazy_rows.js) fetches the rest page
+# by page, keyset-paginated on idx, each page enriched with live stock and
+# rates for its own items. Every other load of a document reads all rows.
+# Cancelled documents are always loaded whole, since amending copies the
+# form's rows.
+
+import frappe
+from frappe import _
+from frappe.desk.form.load import getdoc as load_form_doc
+from frappe.model.base_document import BaseDocument
+from frappe.utils import cint
+
+from boq.instrumentation import instrument
+from boq.rates import get_rate_map
+from boq.stock import get_cached_stock_map, get_item_codes
+
+LAZY_DOCTYPES = ("Technical Offer", "Purchase BOQ", "Commercial Offer")
+
+# Documents with more item rows than this are loaded lazily
+LAZY_ROWS_THRESHOLD = 500
+
+DEFAULT_PAGE_LENGTH = 200
+MAX_PAGE_LENGTH = 1000
+
+
+@frappe.whitelist()
+@instrument
+def get_child_rows(doctype, name, parentfield="items", after_idx=0, page_length=DEFAULT_PAGE_LENGTH):
+    """Child rows with idx > after_idx, in idx order, with live_stock and live_rate per row"""
+    if doctype not in LAZY_DOCTYPES:
+        frappe.throw(_("Paged rows are not supported for {0}").format(doctype))
+
+    frappe.has_permission(doctype, "read", name, throw=True)
+
+    table_df = frappe.get_meta(doctype).get_field(parentfield)
+    if not table_df or table_df.fieldtype != "Table":
+        frappe.throw(_("{0} is not a table of {1}").format(parentfield, doctype))
+
+    page_length = min(max(cint(page_length), 1), MAX_PAGE_LENGTH)
+    rows = frappe.get_all(
+        table_df.options,
+        filters={
+            "parent": name,
+            "parenttype": doctype,
+            "parentfield": parentfield,
+            "idx": [">", cint(after_idx)],
+        },
+        fields=["*"],
+        order_by="idx",
+        limit=page_length + 1
+    )
+
+    has_more = len(rows) > page_length
+    rows = rows[:page_length]
+
+    add_live_values(rows)
+    for row in rows:
+        row.doctype = table_df.options
+
+    return {
+        "rows": rows,
+        "last_idx": rows[-1].idx if rows else cint(after_idx),
+        "has_more": has_more
+    }
+
+
+def add_live_values(rows):
+    """Set live_stock and live_rate on rows from one stock and one rate lookup"""
+    item_codes = get_item_codes(rows)
+    if not item_codes:
+        return
+
+    stock_map = get_cached_stock_map(item_codes)
+    rate_map = get_rate_map(item_codes)
+    for row in rows:
+        row.live_stock = stock_map.get(row.item_code, 0)
+        row.live_rate = rate_map.get(row.item_code, 0)
+
+
+@frappe.whitelist()
+def getdoc(doctype, name, user=None):
+    """Override of frappe.desk.form.load.getdoc: mark the document the form asks for"""
+    if doctype not in LAZY_DOCTYPES:
+        return load_form_doc(doctype, name, user)
+
+    frappe.flags.boq_lazy_load = (doctype, name)
+    try:
+        return load_form_doc(doctype, name, user)
+    finally:
+        frappe.flags.boq_lazy_load = None
+
+
+def load_first_page(doc):
+    """load_from_db: read only the first page of item rows of a large document
+
+    Applies once, to the document marked by getdoc, if it is not cancelled and
+    has more than LAZY_ROWS_THRESHOLD item rows. Returns False when the caller
+    should load the document as usual.
+    """
+    if frappe.flags.boq_lazy_load != (doc.doctype, doc.name):
+        return False
+    frappe.flags.boq_lazy_load = None
+
+    parent = frappe.db.get_value(doc.doctype, doc.name, "*", as_dict=True)
+    if not parent or parent.docstatus == 2:
+        return False
+
+    meta = frappe.get_meta(doc.doctype)
+    items_doctype = meta.get_field("items").options
+    total = frappe.db.count(items_doctype, {"parent": doc.name, "parenttype": doc.doctype, "parentfield": "items"})
+    if total <= LAZY_ROWS_THRESHOLD:
+        return False
+
+    for df in meta.get_table_fields():
+        parent[df.fieldname] = frappe.get_all(
+            df.options,
+            filters={"parent": doc.name, "parenttype": doc.doctype, "parentfield": df.fieldname},
+            fields=["*"],
+            order_by="idx",
+            limit=DEFAULT_PAGE_LENGTH if df.fieldname == "items" else None
+        )
+
+    # what Document.load_from_db does with the full rows
+    BaseDocument.__init__(doc, parent)
+    doc.flags.lazy_rows_truncated = True
+    doc.flags.lazy_rows_total = total
+    return True
+
+
+def set_lazy_rows_onload(doc):
+    """onload: tell the form how many item rows are still to come
+
+    The first page gets the same live_stock and live_rate as later pages.
+    """
+    if not doc.flags.lazy_rows_truncated:
+        return
+
+    rows = [frappe._dict({"name": row.name, "item_code": row.item_code}) for row in doc.items]
+    add_live_values(rows)
+
+    doc.set_onload("boq_lazy_rows", {
+        "parentfield": "items",
+        "total": doc.flags.lazy_rows_total,
+        "page_length": DEFAULT_PAGE_LENGTH,
+        "live_values": {
+            row.name: {"live_stock": row.get("live_stock", 0), "live_rate": row.get("live_rate", 0)}
+            for row in rows
+        }
+    })
+
+
+def validate_rows_loaded(doc):
+    """validate / before_update_after_submit / before_cancel: refuse to write a partial items table
+
+    Saving rewrites the child tables, so missing rows would be deleted. A
+    document loaded with its first page only (load_first_page) is never
+    written. Submitted documents are also compared with the saved row count,
+    which catches a form sent back before every page of rows arrived; drafts
+    may lose rows on purpose, so the form script blocks their save instead.
+    """
+    if doc.flags.lazy_rows_truncated:
+        frappe.throw(_("{0} was loaded with only part of its rows and cannot be saved").format(doc.name))
+
+    if doc.get("_action") not in ("update_after_submit", "cancel"):
+        return
+
+    child_doctype = frappe.get_meta(doc.doctype).get_field("items").options
+    saved = frappe.db.count(child_doctype, {"parent": doc.name, "parenttype": doc.doctype, "parentfield": "items"})
+
+    if len(doc.get("items") or []) < saved:
+        frappe.throw(_("Rows of {0} are still loading, please wait and try again").format(doc.name))
@@ -0,0 +1,137 @@
+# Copyright (c) 2026, Som and contributors
+# For license information, please see license.txt
+
+# export.py (Server-side)
+#
+# Streaming XLSX / CSV export of Purchase BOQ and Commercial Offer rows.
+# Child rows are read from an unbuffered (server-side) cursor and written
+# straight into a write-only workbook or csv writer backed by a temporary
+# file, so memory use does not grow with the number of rows.
+#
+#   /api/method/boq.export.export_boq?doctype=Purchase BOQ&name=PB-0001&file_format=xlsx
+
+import csv
+import io
+import tempfile
+
+import frappe
+from frappe import _
+from frappe.model import data_fieldtypes
+from frappe.utils import strip_html_tags
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import wrap_file
+
+EXPORT_DOCTYPES = ("Purchase BOQ", "Commercial Offer")
+
+# parent table field -> sheet / section title
+EXPORT_TABLES = {
+    "items": "Items",
+    "services": "Services",
+}
+
+FILE_FORMATS = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+@frappe.whitelist()
+def export_boq(doctype, name, file_format="xlsx"):
+    """Download the item and service rows of a Purchase BOQ or Commercial Offer"""
+    if doctype not in EXPORT_DOCTYPES:
+        frappe.throw(_("Export is not supported for {0}").format(doctype))
+
+    if file_format not in FILE_FORMATS:
+        frappe.throw(_("Unsupported file format: {0}").format(file_format))
+
+    frappe.has_permission(doctype, "read", name, throw=True)
+
+    # resolve columns before streaming: no other query may run on the
+    # connection while the unbuffered cursor is open
+    tables = [
+        (title, *get_export_columns(doctype, fieldname))
+        for fieldname, title in EXPORT_TABLES.items()
+    ]
+
+    out = tempfile.TemporaryFile()
+    if file_format == "xlsx":
+        write_xlsx(out, doctype, name, tables)
+    else:
+        write_csv(out, doctype, name, tables)
+    out.seek(0)
+
+    filename = f"{frappe.scrub(name)}.{file_format}"
+    response = Response(
+        wrap_file(frappe.local.request.environ, out),
+        mimetype=FILE_FORMATS[file_format],
+        direct_passthrough=True
+    )
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    return response
+
+
+def get_export_columns(doctype, table_fieldname):
+    """Return (child doctype, [exported fields]) for a table field"""
+    child_doctype = frappe.get_meta(doctype).get_field(table_fieldname).options
+    fields = [
+        df for df in frappe.get_meta(child_doctype).fields
+        if df.fieldtype in data_fieldtypes and not df.hidden
+    ]
+
+    return child_doctype, fields
+
+
+def iter_rows(doctype, name, child_doctype, fields):
+    """Yield child rows as tuples, in idx order, from a server-side cursor"""
+    columns = ", ".join(f"`{df.fieldname}`" for df in fields)
+    html_columns = [i for i, df in enumerate(fields) if df.fieldtype in ("Text Editor", "HTML Editor")]
+
+    with frappe.db.unbuffered_cursor():
+        for row in frappe.db.sql(
+            f"""
+            SELECT {columns}
+            FROM `tab{child_doctype}`
+            WHERE parent = %(parent)s AND parenttype = %(parenttype)s
+            ORDER BY idx
+            """,
+            {"parent": name, "parenttype": doctype},
+            as_iterator=True
+        ):
+            if html_columns:
+                row = list(row)
+                for i in html_columns:
+                    row[i] = strip_html_tags(row[i] or "").strip()
+
+            yield row
+
+
+def write_xlsx(out, doctype, name, tables):
+    """One write-only sheet per table"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for title, child_doctype, fields in tables:
+        sheet = workbook.create_sheet(_(title))
+        sheet.append([_(df.label or df.fieldname) for df in fields])
+        for row in iter_rows(doctype, name, child_doctype, fields):
+            sheet.append(row)
+
+    workbook.save(out)
+
+
+def write_csv(out, doctype, name, tables):
+    """Tables one after another, each under its title and header row"""
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+
+    for i, (title, child_doctype, fields) in enumerate(tables):
+        if i:
+            writer.writerow([])
+        writer.writerow([_(title)])
+        writer.writerow([_(df.label or df.fieldname) for df in fields])
+        writer.writerows(iter_rows(doctype, name, child_doctype, fields))
+
+    text.flush()
+    # keep the underlying file open for the response
+    text.detach()
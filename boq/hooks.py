@@ -10,9 +10,54 @@ app_license = "mit"
 
 # required_apps = []
 doc_events = {
-    "Final BOQ": {
-        "validate": "boq.boq.doctype.final_boq.final_boq.validate_stock_availability",
-        "before_submit": "boq.boq.doctype.final_boq.final_boq.validate_stock_availability"
+    "Purchase BOQ": {
+        "validate": "boq.stock.validate_stock_availability"
+    },
+    "Commercial Offer": {
+        "validate": "boq.stock.validate_stock_availability",
+        "after_insert": "boq.stock.invalidate_offer_stock_cache",
+        "on_submit": "boq.stock.invalidate_offer_stock_cache",
+        "on_cancel": "boq.stock.invalidate_offer_stock_cache",
+        "on_update_after_submit": "boq.stock.invalidate_offer_stock_cache"
+    },
+    "Sales Order": {
+        "on_submit": "boq.stock.invalidate_order_stock_cache",
+        "on_cancel": [
+            "boq.boq.doctype.commercial_offer.commercial_offer.release_sales_order",
+            "boq.stock.invalidate_order_stock_cache"
+        ],
+        "on_trash": "boq.boq.doctype.commercial_offer.commercial_offer.release_sales_order"
+    },
+    "Purchase Order": {
+        "on_submit": "boq.stock.invalidate_order_stock_cache",
+        "on_cancel": "boq.stock.invalidate_order_stock_cache"
+    },
+    "Stock Ledger Entry": {
+        "on_submit": "boq.stock.invalidate_stock_cache",
+        "on_cancel": "boq.stock.invalidate_stock_cache"
+    },
+    "Short Forms": {
+        "on_update": "boq.boq.doctype.technical_offer.technical_offer.clear_short_forms_cache",
+        "on_trash": "boq.boq.doctype.technical_offer.technical_offer.clear_short_forms_cache"
+    },
+    "Item Group": {
+        "on_update": "boq.boq.doctype.sales_boq_item.sales_boq_item.clear_item_group_tree_cache",
+        "on_trash": "boq.boq.doctype.sales_boq_item.sales_boq_item.clear_item_group_tree_cache",
+        "after_rename": "boq.boq.doctype.sales_boq_item.sales_boq_item.clear_item_group_tree_cache"
+    },
+    "Item": {
+        "on_update": [
+            "boq.item_search.update_item_index",
+            "boq.boq.doctype.sales_boq_item.sales_boq_item.clear_item_group_cache"
+        ],
+        "on_trash": [
+            "boq.item_search.remove_item_index",
+            "boq.boq.doctype.sales_boq_item.sales_boq_item.clear_item_group_cache"
+        ],
+        "after_rename": [
+            "boq.item_search.rename_item_index",
+            "boq.boq.doctype.sales_boq_item.sales_boq_item.clear_item_group_cache"
+        ]
     }
 }
 
@@ -67,6 +112,11 @@ fixtures = [
 
 # include js in doctype views
 # doctype_js = {"doctype" : "public/js/doctype.js"}
+doctype_js = {
+    "Technical Offer": "public/js/lazy_rows.js",
+    "Purchase BOQ": "public/js/lazy_rows.js",
+    "Commercial Offer": "public/js/lazy_rows.js"
+}
 # doctype_list_js = {"doctype" : "public/js/doctype_list.js"}
 # doctype_tree_js = {"doctype" : "public/js/doctype_tree.js"}
 # doctype_calendar_js = {"doctype" : "public/js/doctype_calendar.js"}
@@ -197,9 +247,9 @@ fixtures = [
 # Overriding Methods
 # ------------------------------
 #
-# override_whitelisted_methods = {
-# 	"frappe.desk.doctype.event.event.get_events": "boq.event.get_events"
-# }
+override_whitelisted_methods = {
+    "frappe.desk.form.load.getdoc": "boq.child_rows.getdoc"
+}
 #
 # each overriding function accepts a `data` argument;
 # generated from the base implementation of the doctype dashboard,
@@ -220,7 +270,7 @@ fixtures = [
 # Request Events
 # ----------------
 # before_request = ["boq.utils.before_request"]
-# after_request = ["boq.utils.after_request"]
+after_request = ["boq.instrumentation.record_request_samples"]
 
 # Job Events
 # ----------
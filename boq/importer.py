@@ -0,0 +1,294 @@
+# Copyright (c) 2026, Som and contributors
+# For license information, please see license.txt
+
+# importer.py (Server-side)
+#
+# Bulk import of Technical Offer items (Sales BOQ Item) from CSV / XLSX.
+# The file is read row by row, validated a chunk at a time in a background
+# job with one lookup per chunk for Items, UOMs and Item Groups, and valid
+# chunks are written with multi-row INSERTs. The import runs in a single
+# transaction: if any row fails, nothing is written and the errors are
+# reported back to the user.
+
+import csv
+from itertools import islice
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt, now
+
+from boq.bulk import BULK_INSERT_CHUNK_SIZE
+
+IMPORT_CHUNK_SIZE = 1000
+
+# Row errors reported back to the user; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+# normalized column header -> Sales BOQ Item field
+COLUMN_MAP = {
+    "item_code": "item_code",
+    "item": "item_code",
+    "qyt": "qyt",
+    "qty": "qyt",
+    "quantity": "qyt",
+    "uom": "uom",
+    "item_category": "item_category",
+    "item_group": "item_category",
+}
+
+ROW_FIELDS = (
+    "name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "parent", "parenttype", "parentfield", "idx",
+    "item_code", "item_name", "item_category", "qyt", "uom",
+)
+
+
+@frappe.whitelist()
+def import_technical_offer_items(technical_offer, file_url):
+    """Queue an import of Sales BOQ Item rows from an uploaded CSV / XLSX file"""
+    doc = frappe.get_doc("Technical Offer", technical_offer)
+    doc.check_permission("write")
+    validate_target(doc.docstatus)
+
+    file_doc = get_file_doc(file_url)
+    frappe.has_permission("File", "read", file_doc, throw=True)
+
+    frappe.enqueue(
+        "boq.importer.run_import",
+        queue="long",
+        timeout=3600,
+        job_id=f"boq_import|{technical_offer}",
+        deduplicate=True,
+        technical_offer=technical_offer,
+        file_url=file_url,
+        user=frappe.session.user
+    )
+    frappe.msgprint(_("Item import has been queued"), alert=True)
+
+
+def run_import(technical_offer, file_url, user=None):
+    """Background job: validate and insert every row of the file
+
+    boq_import_finished is published whatever happens, with an "error"
+    message if the import could not run.
+    """
+    try:
+        result = _run_import(technical_offer, file_url, user)
+    except Exception as e:
+        frappe.db.rollback()
+        if not isinstance(e, frappe.ValidationError):
+            frappe.log_error(title=_("Item import failed for {0}").format(technical_offer))
+
+        result = {
+            "inserted": 0,
+            "error_count": 0,
+            "errors": [],
+            "error": str(e) if isinstance(e, frappe.ValidationError) else _("Unexpected error, see the Error Log")
+        }
+
+    frappe.publish_realtime(
+        "boq_import_finished",
+        {"technical_offer": technical_offer, **result},
+        user=user,
+        doctype="Technical Offer",
+        docname=technical_offer
+    )
+
+
+def _run_import(technical_offer, file_url, user):
+    path = get_file_doc(file_url).get_full_path()
+    total = count_rows(path)
+
+    docstatus = frappe.db.get_value("Technical Offer", technical_offer, "docstatus", for_update=True)
+    validate_target(docstatus)
+
+    idx = cint(frappe.db.sql(
+        """
+        SELECT MAX(idx) FROM `tabSales BOQ Item`
+        WHERE parent = %s AND parenttype = 'Technical Offer' AND parentfield = 'items'
+        """,
+        technical_offer
+    )[0][0])
+
+    inserted = 0
+    errors = []
+    error_count = 0
+    rows = iter_file_rows(path)
+
+    while True:
+        chunk = list(islice(rows, IMPORT_CHUNK_SIZE))
+        if not chunk:
+            break
+
+        valid, chunk_errors = validate_chunk(chunk)
+        error_count += len(chunk_errors)
+        errors.extend(chunk_errors[:MAX_REPORTED_ERRORS - len(errors)])
+
+        if not error_count:
+            insert_rows(technical_offer, valid, idx)
+            idx += len(valid)
+            inserted += len(valid)
+
+        processed = chunk[-1].row_no - 1
+        frappe.publish_progress(
+            min(processed * 100 / total, 100) if total else 100,
+            title=_("Importing Items"),
+            doctype="Technical Offer",
+            docname=technical_offer,
+            description=_("{0} of {1} rows").format(processed, total)
+        )
+
+    if error_count:
+        frappe.db.rollback()
+        inserted = 0
+    else:
+        frappe.db.set_value("Technical Offer", technical_offer, "modified_by", user or frappe.session.user)
+        frappe.db.commit()
+
+    return {"inserted": inserted, "error_count": error_count, "errors": errors}
+
+
+def validate_target(docstatus):
+    if docstatus is None:
+        frappe.throw(_("Technical Offer not found"))
+
+    if cint(docstatus) != 0:
+        frappe.throw(_("Items can only be imported into a draft Technical Offer"))
+
+
+def get_file_doc(file_url):
+    file_name = frappe.db.get_value("File", {"file_url": file_url}, "name")
+    if not file_name:
+        frappe.throw(_("File {0} not found").format(file_url))
+
+    file_doc = frappe.get_doc("File", file_name)
+    if not (file_doc.file_name or file_url).lower().endswith((".csv", ".xlsx")):
+        frappe.throw(_("Only CSV and XLSX files can be imported"))
+
+    return file_doc
+
+
+def count_rows(path):
+    """Number of data rows, for progress only"""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return max(sum(1 for _row in csv.reader(f)) - 1, 0)
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        return max((workbook.active.max_row or 1) - 1, 0)
+    finally:
+        workbook.close()
+
+
+def iter_file_rows(path):
+    """Yield _dict rows keyed by Sales BOQ Item field, with their file row number"""
+    raw_rows = _iter_csv(path) if path.lower().endswith(".csv") else _iter_xlsx(path)
+
+    header = next(raw_rows, None)
+    if not header:
+        return
+
+    columns = [COLUMN_MAP.get(frappe.scrub(str(value or "")).strip("_")) for value in header]
+    if "item_code" not in columns:
+        frappe.throw(_("The file must have an Item Code column"))
+
+    for row_no, values in enumerate(raw_rows, start=2):
+        row = frappe._dict(row_no=row_no)
+        # rows may be shorter or longer than the header
+        for field, value in zip(columns, values, strict=False):
+            if field and value not in (None, ""):
+                row[field] = value.strip() if isinstance(value, str) else value
+
+        if len(row) > 1:
+            yield row
+
+
+def validate_chunk(chunk):
+    """Resolve a chunk of file rows; return (valid rows, [error messages])"""
+    items = {
+        item.name: item
+        for item in frappe.get_all(
+            "Item",
+            filters={"name": ["in", list({str(row.item_code) for row in chunk if row.item_code})]},
+            fields=["name", "item_name", "item_group", "stock_uom", "disabled"]
+        )
+    } if any(row.item_code for row in chunk) else {}
+
+    uoms = _get_existing("UOM", {row.uom for row in chunk if row.uom})
+    item_groups = _get_existing("Item Group", {row.item_category for row in chunk if row.item_category})
+
+    valid = []
+    errors = []
+    for row in chunk:
+        item = items.get(str(row.item_code or ""))
+        qty = flt(row.qyt) if row.qyt is not None else 1
+
+        if not row.item_code:
+            error = _("Item Code is missing")
+        elif not item:
+            error = _("Item {0} does not exist").format(row.item_code)
+        elif item.disabled:
+            error = _("Item {0} is disabled").format(row.item_code)
+        elif qty <= 0:
+            error = _("Quantity must be greater than 0")
+        elif row.uom and row.uom not in uoms:
+            error = _("UOM {0} does not exist").format(row.uom)
+        elif row.item_category and row.item_category not in item_groups:
+            error = _("Item Group {0} does not exist").format(row.item_category)
+        else:
+            valid.append(frappe._dict(
+                item_code=item.name,
+                item_name=item.item_name,
+                item_category=row.item_category or item.item_group,
+                qyt=qty,
+                uom=row.uom or item.stock_uom
+            ))
+            continue
+
+        errors.append(_("Row {0}: {1}").format(row.row_no, error))
+
+    return valid, errors
+
+
+def insert_rows(technical_offer, rows, start_idx):
+    """Append validated rows to the Technical Offer's items table"""
+    if not rows:
+        return
+
+    timestamp = now()
+    user = frappe.session.user
+    values = [
+        (
+            frappe.generate_hash(length=10), timestamp, timestamp, user, user, 0,
+            technical_offer, "Technical Offer", "items", start_idx + i,
+            row.item_code, row.item_name, row.item_category, row.qyt, row.uom
+        )
+        for i, row in enumerate(rows, start=1)
+    ]
+
+    frappe.db.bulk_insert("Sales BOQ Item", ROW_FIELDS, values, chunk_size=BULK_INSERT_CHUNK_SIZE)
+
+
+def _get_existing(doctype, names):
+    if not names:
+        return set()
+
+    return set(frappe.get_all(doctype, filters={"name": ["in", list(names)]}, pluck="name"))
+
+
+def _iter_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from csv.reader(f)
+
+
+def _iter_xlsx(path):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
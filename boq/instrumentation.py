@@ -0,0 +1,185 @@
+# Copyright (c) 2026, Som and contributors
+# For license information, please see license.txt
+
+# instrumentation.py (Server-side)
+#
+# Opt-in call metrics for whitelisted BOQ endpoints. With "boq_instrumentation"
+# set in site_config.json, every call of an @instrument-ed method records its
+# wall time, SQL query count, rows fetched and response size in a capped Redis
+# list per method. The BOQ API Performance report aggregates those samples
+# into percentiles. When the flag is off the decorator only checks it.
+#
+# The response size is read from the response Frappe already serialized (see
+# record_request_samples, an after_request hook), so it is only known for
+# the method called by the request itself; nested and non-HTTP calls record 0.
+
+import json
+import math
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+import frappe
+from frappe.utils import flt
+
+SAMPLES_KEY = "boq_instrumentation"
+METHODS_KEY = "boq_instrumentation_methods"
+
+# Samples kept per method; older ones are dropped
+MAX_SAMPLES = 1000
+
+
+def is_enabled():
+    return bool(frappe.conf.get("boq_instrumentation"))
+
+
+def instrument(fn):
+    """Record metrics of each call of fn while instrumentation is enabled
+
+    Apply below @frappe.whitelist() so the whitelisted function is the wrapper.
+    """
+    method = f"{fn.__module__}.{fn.__qualname__}"
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not is_enabled():
+            return fn(*args, **kwargs)
+
+        with track() as metrics:
+            result = fn(*args, **kwargs)
+
+        if _is_request_method(method):
+            # recorded with the response size once the response is built
+            frappe.local.boq_request_samples = [
+                *getattr(frappe.local, "boq_request_samples", []), (method, metrics)
+            ]
+        else:
+            record(method, metrics)
+
+        return result
+
+    return wrapper
+
+
+@contextmanager
+def track():
+    """Measure the block: duration (seconds), queries and rows fetched by frappe.db.sql"""
+    metrics = frappe._dict(duration=0, queries=0, rows=0, payload_bytes=0)
+    db = frappe.local.db
+    patched = "sql" in db.__dict__
+    sql = db.sql
+
+    def tracked_sql(*args, **kwargs):
+        result = sql(*args, **kwargs)
+        metrics.queries += 1
+        if isinstance(result, (list, tuple)):
+            metrics.rows += len(result)
+        return result
+
+    db.sql = tracked_sql
+    start = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics.duration = time.perf_counter() - start
+        if patched:
+            db.sql = sql
+        else:
+            del db.sql
+
+
+def record_request_samples(response=None, request=None):
+    """after_request hook: record samples of the request's method with the response size"""
+    samples = getattr(frappe.local, "boq_request_samples", None)
+    if not samples:
+        return
+
+    frappe.local.boq_request_samples = []
+    payload_bytes = _get_response_size(response)
+    for method, metrics in samples:
+        metrics.payload_bytes = payload_bytes
+        record(method, metrics)
+
+
+def _is_request_method(method):
+    request = getattr(frappe.local, "request", None)
+    return bool(request) and (frappe.local.form_dict or {}).get("cmd") == method
+
+
+def _get_response_size(response):
+    if response is None:
+        return 0
+
+    if response.content_length is not None:
+        return response.content_length
+
+    # streamed responses (file downloads) are not read here
+    return len(response.get_data()) if response.is_sequence else 0
+
+
+def record(method, metrics):
+    """Append a sample to the method's capped list"""
+    cache = frappe.cache()
+    key = cache.make_key(f"{SAMPLES_KEY}|{method}")
+    sample = json.dumps([
+        round(metrics.duration * 1000, 2), metrics.queries, metrics.rows, metrics.payload_bytes
+    ])
+
+    pipe = cache.pipeline()
+    pipe.lpush(key, sample)
+    pipe.ltrim(key, 0, MAX_SAMPLES - 1)
+    pipe.sadd(cache.make_key(METHODS_KEY), method)
+    pipe.execute()
+
+
+def get_stats():
+    """Per-method call count and percentiles of the recorded samples"""
+    cache = frappe.cache()
+    methods = sorted(frappe.safe_decode(m) for m in cache.smembers(METHODS_KEY))
+
+    pipe = cache.pipeline()
+    for method in methods:
+        pipe.lrange(cache.make_key(f"{SAMPLES_KEY}|{method}"), 0, -1)
+
+    stats = []
+    for method, samples in zip(methods, pipe.execute(), strict=True):
+        if not samples:
+            continue
+
+        columns = list(zip(*(json.loads(frappe.safe_decode(sample)) for sample in samples), strict=True))
+        duration, queries, rows, payload = (sorted(column) for column in columns)
+
+        stats.append(frappe._dict({
+            "method": method,
+            "calls": len(duration),
+            "p50_ms": percentile(duration, 50),
+            "p95_ms": percentile(duration, 95),
+            "p99_ms": percentile(duration, 99),
+            "max_ms": duration[-1],
+            "avg_queries": flt(sum(queries) / len(queries), 1),
+            "max_queries": queries[-1],
+            "avg_rows": flt(sum(rows) / len(rows), 1),
+            "avg_payload_kb": flt(sum(payload) / len(payload) / 1024, 1),
+        }))
+
+    return stats
+
+
+@frappe.whitelist()
+def clear_stats():
+    """Drop all recorded samples"""
+    frappe.only_for("System Manager")
+
+    cache = frappe.cache()
+    methods = [frappe.safe_decode(m) for m in cache.smembers(METHODS_KEY)]
+    keys = [cache.make_key(f"{SAMPLES_KEY}|{method}") for method in methods]
+    cache.delete(*keys, cache.make_key(METHODS_KEY))
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0
+
+    rank = max(math.ceil(pct / 100 * len(values)), 1)
+    return values[min(rank, len(values)) - 1]
@@ -0,0 +1,311 @@
+# Copyright (c) 2026, Som and contributors
+# For license information, please see license.txt
+
+# item_search.py (Server-side)
+#
+# Item search for the Technical Offer search panel. Item attributes are
+# split into trigrams and stored in BOQ Item Search Token, indexed on
+# (search_field, token), so a search is an indexed IN lookup per field
+# instead of leading-wildcard LIKEs over Item. The index is kept up to date
+# from Item doc_events (see hooks.py) and can be rebuilt in the background.
+
+import re
+
+import frappe
+from frappe import _
+from frappe.utils import cint, now
+
+TOKEN_DOCTYPE = "BOQ Item Search Token"
+
+# Technical Offer search field -> indexed Item field
+SEARCH_FIELDS = {
+    "search_item_name": "item_name",
+    "search_moc": "custom_moc",
+    "search_make": "custom_make",
+    "search_size": "custom_size",
+    "search_end_connection": "custom_end_connection",
+}
+
+DEFAULT_PAGE_LENGTH = 20
+REBUILD_CHUNK_SIZE = 2000
+
+
+def get_trigrams(value, query=False):
+    """Trigrams of every word of value
+
+    Indexed words are padded ("  ss304 ") so short words still produce
+    trigrams. Query words of three or more characters are not padded, which
+    makes them match anywhere inside a word; shorter ones match word starts.
+    """
+    trigrams = set()
+    for word in re.findall(r"\w+", (value or "").lower()):
+        if not query:
+            word = f"  {word} "
+        elif len(word) < 3:
+            word = f"  {word}"
+
+        trigrams.update(word[i:i + 3] for i in range(len(word) - 2))
+
+    return trigrams
+
+
+# ------------------------------------------------
+# SEARCH
+# ------------------------------------------------
+@frappe.whitelist()
+def search_items(filters=None, page=1, page_length=DEFAULT_PAGE_LENGTH):
+    """Ranked, paginated item search over the Technical Offer search fields"""
+    filters = frappe.parse_json(filters) if isinstance(filters, str) else (filters or {})
+    page = max(cint(page), 1)
+    page_length = min(max(cint(page_length), 1), 500)
+
+    names = get_matching_items(filters, start=(page - 1) * page_length, page_length=page_length + 1)
+    has_more = len(names) > page_length
+    names = names[:page_length]
+
+    items = {
+        item.name: item
+        for item in frappe.get_all(
+            "Item",
+            filters={"name": ["in", names]},
+            fields=["name", "item_group", *SEARCH_FIELDS.values()]
+        )
+    } if names else {}
+
+    return {
+        "items": [items[name] for name in names if name in items],
+        "page": page,
+        "has_more": has_more
+    }
+
+
+@frappe.whitelist()
+@frappe.validate_and_sanitize_search_inputs
+def item_query(doctype, txt, searchfield, start, page_len, filters):
+    """Link query for item_code that ranks items by the search panel filters and txt"""
+    names = get_matching_items(dict(filters or {}), start=cint(start), page_length=cint(page_len), txt=txt)
+    if not names:
+        return []
+
+    details = {
+        item.name: item
+        for item in frappe.get_all(
+            "Item",
+            filters={"name": ["in", names]},
+            fields=["name", "item_name", "item_group"]
+        )
+    }
+
+    return [
+        (name, details[name].item_name, details[name].item_group)
+        for name in names if name in details
+    ]
+
+
+def get_matching_items(filters, start=0, page_length=DEFAULT_PAGE_LENGTH, txt=None):
+    """Item names matching filters (and txt, on item name or item code), best match first
+
+    Items whose field starts with the searched text come first, then items
+    whose indexed text is mostly made of the matched trigrams, i.e. tight
+    matches before long names that merely contain the query.
+    """
+    values = {"start": cint(start), "page_length": cint(page_length)}
+    txt = (txt or "").strip()
+
+    # (search term key, indexed Item field, text)
+    terms = [
+        (search_field, item_field, filters.get(search_field))
+        for search_field, item_field in SEARCH_FIELDS.items()
+        if get_trigrams(filters.get(search_field), query=True)
+    ]
+    if txt:
+        terms.append(("txt", "item_name", txt))
+
+    item_group_condition = ""
+    if filters.get("search_item_group"):
+        values["item_groups"] = tuple(get_item_groups(filters["search_item_group"]))
+        item_group_condition = "AND i.item_group IN %(item_groups)s"
+
+    if not terms:
+        # no text filters: plain indexed Item lookup
+        return frappe.db.sql_list(
+            f"""
+            SELECT i.name FROM `tabItem` i
+            WHERE i.disabled = 0 {item_group_condition}
+            ORDER BY i.item_name, i.name
+            LIMIT %(page_length)s OFFSET %(start)s
+            """,
+            values
+        )
+
+    token_conditions = []
+    matched = []
+    match_conditions = []
+    prefix_scores = []
+
+    for i, (key, item_field, text) in enumerate(terms):
+        values[f"field_{i}"] = item_field
+        values[f"prefix_{i}"] = _like_prefix(text)
+        prefix_scores.append(f"(i.`{item_field}` LIKE %(prefix_{i})s)")
+
+        trigrams = get_trigrams(text, query=True)
+        if not trigrams:
+            # txt without word characters: item code prefix only
+            match_conditions.append("m.code_match = 1")
+            continue
+
+        values[f"tokens_{i}"] = tuple(trigrams)
+        values[f"count_{i}"] = len(trigrams)
+        token_conditions.append(f"(t.search_field = %(field_{i})s AND t.token IN %(tokens_{i})s)")
+        matched.append(f"matched_{i}")
+
+        match_condition = f"m.matched_{i} >= %(count_{i})s"
+        if key == "txt":
+            match_condition = f"({match_condition} OR m.code_match = 1)"
+        match_conditions.append(match_condition)
+
+    # candidates: items with matching trigrams, and items whose code starts with txt
+    candidates = []
+    if token_conditions:
+        matched_columns = "".join(
+            f"SUM(CASE WHEN {condition} THEN 1 ELSE 0 END) AS {name}, "
+            for condition, name in zip(token_conditions, matched, strict=True)
+        )
+        candidates.append(f"""
+            SELECT t.item_code, {matched_columns}0 AS code_match
+            FROM `tab{TOKEN_DOCTYPE}` t
+            WHERE {" OR ".join(token_conditions)}
+            GROUP BY t.item_code
+        """)
+    if txt:
+        values["code_prefix"] = _like_prefix(txt)
+        prefix_scores.append("m.code_match")
+        candidates.append(f"""
+            SELECT i.name AS item_code, {"".join(f"0 AS {name}, " for name in matched)}1 AS code_match
+            FROM `tabItem` i
+            WHERE i.name LIKE %(code_prefix)s
+        """)
+
+    values["term_fields"] = tuple({item_field for _key, item_field, _text in terms})
+
+    return frappe.db.sql_list(
+        f"""
+        SELECT m.item_code
+        FROM (
+            SELECT u.item_code, {"".join(f"SUM(u.{name}) AS {name}, " for name in matched)}MAX(u.code_match) AS code_match
+            FROM ({" UNION ALL ".join(candidates)}) u
+            GROUP BY u.item_code
+        ) m
+        INNER JOIN `tabItem` i ON i.name = m.item_code
+        WHERE i.disabled = 0 {item_group_condition}
+            AND {" AND ".join(match_conditions)}
+        ORDER BY
+            {" + ".join(prefix_scores)} DESC,
+            ({" + ".join(f"m.{name}" for name in matched) or "0"}) / GREATEST((
+                SELECT COUNT(*) FROM `tab{TOKEN_DOCTYPE}` total
+                WHERE total.item_code = m.item_code AND total.search_field IN %(term_fields)s
+            ), 1) DESC,
+            i.name
+        LIMIT %(page_length)s OFFSET %(start)s
+        """,
+        values
+    )
+
+
+def _like_prefix(value):
+    """LIKE pattern matching values that start with value"""
+    value = (value or "").strip()
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def get_item_groups(item_group):
+    """item_group and all of its descendants"""
+    return [item_group, *frappe.db.get_descendants("Item Group", item_group)]
+
+
+# ------------------------------------------------
+# INDEX MAINTENANCE
+# ------------------------------------------------
+def update_item_index(doc, method=None):
+    """Item on_update hook: re-tokenize the item if an indexed field changed"""
+    before = doc.get_doc_before_save()
+    if before and all(before.get(field) == doc.get(field) for field in SEARCH_FIELDS.values()):
+        return
+
+    index_items([doc])
+
+
+def remove_item_index(doc, method=None):
+    """Item on_trash hook"""
+    frappe.db.delete(TOKEN_DOCTYPE, {"item_code": doc.name})
+
+
+def rename_item_index(doc, method=None, old=None, new=None, merge=False):
+    """Item after_rename hook"""
+    if merge:
+        frappe.db.delete(TOKEN_DOCTYPE, {"item_code": old})
+        index_items([frappe.get_doc("Item", new)])
+    else:
+        frappe.db.set_value(TOKEN_DOCTYPE, {"item_code": old}, "item_code", new, update_modified=False)
+
+
+def index_items(items):
+    """Replace the tokens of the given items (docs or dicts with name and indexed fields)"""
+    names = [item.get("name") for item in items]
+    if not names:
+        return
+
+    frappe.db.delete(TOKEN_DOCTYPE, {"item_code": ["in", names]})
+
+    timestamp = now()
+    user = frappe.session.user
+    rows = [
+        (frappe.generate_hash(length=10), timestamp, timestamp, user, user, item.get("name"), field, token)
+        for item in items
+        for field in SEARCH_FIELDS.values()
+        for token in get_trigrams(item.get(field))
+    ]
+
+    if rows:
+        frappe.db.bulk_insert(
+            TOKEN_DOCTYPE,
+            ["name", "creation", "modified", "owner", "modified_by", "item_code", "search_field", "token"],
+            rows,
+            chunk_size=REBUILD_CHUNK_SIZE
+        )
+
+
+@frappe.whitelist()
+def rebuild_item_search_index():
+    """Queue a full rebuild of the item search index"""
+    frappe.only_for("System Manager")
+
+    frappe.enqueue(
+        "boq.item_search.build_item_search_index",
+        queue="long",
+        timeout=7200,
+        job_id="boq_item_search_index",
+        deduplicate=True
+    )
+    frappe.msgprint(_("Item search index rebuild has been queued"))
+
+
+def build_item_search_index():
+    """Re-tokenize every Item, a chunk at a time"""
+    frappe.db.delete(TOKEN_DOCTYPE)
+
+    last_name = ""
+    while True:
+        items = frappe.get_all(
+            "Item",
+            filters={"name": [">", last_name]},
+            fields=["name", *SEARCH_FIELDS.values()],
+            order_by="name",
+            limit=REBUILD_CHUNK_SIZE
+        )
+        if not items:
+            break
+
+        index_items(items)
+        frappe.db.commit()
+        last_name = items[-1].name
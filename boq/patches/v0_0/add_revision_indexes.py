@@ -0,0 +1,7 @@
+from boq.revision import REVISION_DOCTYPES, add_revision_indexes
+
+
+def execute():
+    # (base_document, revision) and (base_document, is_latest) on every revisioned doctype
+    for doctype in REVISION_DOCTYPES:
+        add_revision_indexes(doctype)
@@ -0,0 +1,12 @@
+import frappe
+
+
+def execute():
+    # Index existing Items once; new and edited Items are indexed by doc_events
+    frappe.enqueue(
+        "boq.item_search.build_item_search_index",
+        queue="long",
+        timeout=7200,
+        job_id="boq_item_search_index",
+        deduplicate=True
+    )
@@ -0,0 +1,86 @@
+// lazy_rows.js
+//
+// Large BOQ documents arrive with only their first page of item rows (see
+// boq/child_rows.py). Fetch the remaining rows page by page and append them
+// to the grid as they arrive. The grid is read-only and saving is refused
+// until every row is in.
+
+["Technical Offer", "Purchase BOQ", "Commercial Offer"].forEach(doctype => {
+    frappe.ui.form.on(doctype, {
+        refresh(frm) {
+            load_remaining_rows(frm);
+        },
+
+        validate(frm) {
+            // cleared once the last page is in; a failed page leaves it for the next refresh
+            if (frm.doc.__onload?.boq_lazy_rows) {
+                frappe.throw(__("Rows are still loading, please wait and try again"));
+            }
+        }
+    });
+});
+
+function load_remaining_rows(frm) {
+    const lazy = frm.doc.__onload?.boq_lazy_rows;
+    if (!lazy || frm.boq_rows_loading) return;
+
+    const fieldname = lazy.parentfield;
+    const docname = frm.doc.name;
+    const read_only = frm.get_field(fieldname).df.read_only;
+    frm.boq_rows_loading = true;
+    frm.set_df_property(fieldname, "read_only", 1);
+
+    const done = () => {
+        frm.boq_rows_loading = false;
+        frm.set_df_property(fieldname, "read_only", read_only);
+    };
+
+    const load_page = (after_idx) => {
+        frappe.call({
+            method: "boq.child_rows.get_child_rows",
+            args: {
+                doctype: frm.doctype,
+                name: docname,
+                parentfield: fieldname,
+                after_idx,
+                page_length: lazy.page_length
+            },
+            error() {
+                frm.dashboard.hide_progress(__("Loading rows"));
+                done();
+            },
+            callback(r) {
+                // the form moved on to another document
+                if (frm.doc.name !== docname || !r.message) {
+                    done();
+                    return;
+                }
+
+                const { rows, last_idx, has_more } = r.message;
+                rows.forEach(row => {
+                    frappe.model.add_to_locals(row);
+                    frm.doc[fieldname].push(row);
+                });
+
+                frm.refresh_field(fieldname);
+                frm.dashboard.show_progress(
+                    __("Loading rows"),
+                    (frm.doc[fieldname].length / lazy.total) * 100,
+                    __("{0} of {1} rows", [frm.doc[fieldname].length, lazy.total])
+                );
+
+                if (has_more) {
+                    load_page(last_idx);
+                } else {
+                    frm.dashboard.hide_progress(__("Loading rows"));
+                    done();
+                    delete frm.doc.__onload.boq_lazy_rows;
+                }
+            }
+        });
+    };
+
+    const rows = frm.doc[fieldname] || [];
+    rows.forEach(row => Object.assign(row, lazy.live_values?.[row.name]));
+    load_page(rows.length ? rows[rows.length - 1].idx : 0);
+}
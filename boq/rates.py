@@ -0,0 +1,103 @@
+# Copyright (c) 2025, Som and contributors
+# For license information, please see license.txt
+
+# rates.py (Server-side)
+#
+# Bulk item-rate resolution for BOQ documents. Each rate source resolves
+# every pending item code in one query; sources are tried in order and
+# an item keeps the first non-zero rate it gets.
+
+import frappe
+from frappe import _
+from frappe.utils import flt, nowdate
+
+# Default order used when neither the caller nor site config picks one.
+# Set "boq_rate_sources" in site_config.json to change it site-wide.
+DEFAULT_RATE_SOURCES = ("standard_rate",)
+
+
+def get_standard_rates(item_codes, price_list=None):
+    """Item.standard_rate for all item codes"""
+    return _get_item_field_rates(item_codes, "standard_rate")
+
+
+def get_last_purchase_rates(item_codes, price_list=None):
+    """Item.last_purchase_rate for all item codes"""
+    return _get_item_field_rates(item_codes, "last_purchase_rate")
+
+
+def get_price_list_rates(item_codes, price_list=None):
+    """Item Price rates of the given price list, latest valid_from first"""
+    if not price_list or not item_codes:
+        return {}
+
+    # either bound may be unset; undated prices sort after dated ones
+    prices = frappe.db.sql(
+        """
+        SELECT item_code, price_list_rate
+        FROM `tabItem Price`
+        WHERE price_list = %(price_list)s
+            AND item_code IN %(item_codes)s
+            AND (valid_from IS NULL OR valid_from <= %(today)s)
+            AND (valid_upto IS NULL OR valid_upto >= %(today)s)
+        ORDER BY valid_from DESC
+        """,
+        {"price_list": price_list, "item_codes": tuple(item_codes), "today": nowdate()},
+        as_dict=True
+    )
+
+    rates = {}
+    for price in prices:
+        rates.setdefault(price.item_code, flt(price.price_list_rate))
+
+    return rates
+
+
+RATE_SOURCES = {
+    "price_list": get_price_list_rates,
+    "last_purchase_rate": get_last_purchase_rates,
+    "standard_rate": get_standard_rates,
+}
+
+
+def register_rate_source(name, resolver):
+    """Register a resolver(item_codes, price_list=None) -> {item_code: rate}"""
+    RATE_SOURCES[name] = resolver
+
+
+def get_rate_sources():
+    """Configured rate-source order"""
+    return tuple(frappe.conf.get("boq_rate_sources") or DEFAULT_RATE_SOURCES)
+
+
+def get_rate_map(item_codes, price_list=None, rate_sources=None):
+    """Return {item_code: rate}, one query per rate source for all item codes"""
+    pending = list(set(filter(None, item_codes or [])))
+    rate_map = dict.fromkeys(pending, 0)
+
+    for source in rate_sources or get_rate_sources():
+        if not pending:
+            break
+
+        resolver = RATE_SOURCES.get(source)
+        if not resolver:
+            frappe.throw(_("Unknown rate source: {0}").format(source))
+
+        rates = resolver(pending, price_list=price_list)
+        for item_code, rate in rates.items():
+            if rate and item_code in rate_map:
+                rate_map[item_code] = flt(rate)
+
+        pending = [item_code for item_code in pending if not rate_map[item_code]]
+
+    return rate_map
+
+
+def _get_item_field_rates(item_codes, fieldname):
+    items = frappe.get_all(
+        "Item",
+        filters={"name": ["in", item_codes]},
+        fields=["name", fieldname]
+    )
+
+    return {item.name: flt(item.get(fieldname)) for item in items}
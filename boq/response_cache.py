@@ -0,0 +1,93 @@
+# Copyright (c) 2026, Som and contributors
+# For license information, please see license.txt
+
+# response_cache.py (Server-side)
+#
+# Cached payloads of the stage-to-stage data endpoints (get_sales_boq_data,
+# get_purchase_boq_data). A payload is cached under the source document's
+# modified timestamp, so any save makes a new entry; item stock is laid over
+# it on every call from the short-TTL stock cache so it stays fresh. Each
+# response carries a content-hash ETag, in the payload and as the ETag
+# header: a client that sends it back as If-None-Match gets an empty 304,
+# one that sends it as the etag argument gets {"not_modified": 1}.
+
+import hashlib
+
+import frappe
+from frappe.utils import cint
+from werkzeug.wrappers import Response
+
+from boq.stock import get_cached_stock_map, get_item_codes
+
+PAYLOAD_CACHE_KEY = "boq_payload"
+
+# Seconds a payload stays cached. Rates in payloads do not depend on the
+# document's modified timestamp, so keep this short.
+# Set "boq_payload_cache_ttl" in site_config.json to change it.
+DEFAULT_PAYLOAD_CACHE_TTL = 600
+
+
+def get_cached_payload(doctype, name, build, variant=None, etag=None, refresh=None):
+    """Return build() for doctype/name, cached, with fresh stock and an etag
+
+    variant distinguishes payloads of the same document built with different
+    arguments (e.g. price list). refresh(payload) updates, on every call, the
+    parts that do not follow the document's modified timestamp. If the
+    request's If-None-Match header matches the result, an empty 304 response
+    is returned; if the etag argument does, {"not_modified": 1, "etag": ...}.
+    """
+    modified = frappe.db.get_value(doctype, name, "modified")
+    if not modified:
+        return build()
+
+    key = "|".join([PAYLOAD_CACHE_KEY, doctype, name, str(modified), frappe.as_json(variant or {}, indent=None)])
+    payload = frappe.cache().get_value(key)
+    if payload is None:
+        payload = build()
+        frappe.cache().set_value(key, payload, expires_in_sec=get_payload_cache_ttl())
+    else:
+        overlay_stock(payload)
+
+    if refresh:
+        refresh(payload)
+
+    payload["etag"] = get_etag(payload)
+    etag_header = f'"{payload["etag"]}"'
+
+    if getattr(frappe.local, "request", None):
+        if payload["etag"] in get_if_none_match():
+            return Response(status=304, headers={"ETag": etag_header})
+
+        frappe.local.response_headers["ETag"] = etag_header
+
+    if etag == payload["etag"]:
+        return {"not_modified": 1, "etag": payload["etag"]}
+
+    return payload
+
+
+def get_if_none_match():
+    """Entity tags of the request's If-None-Match header, unquoted"""
+    header = frappe.get_request_header("If-None-Match") or ""
+    return {
+        tag.strip().removeprefix("W/").strip('"')
+        for tag in header.split(",")
+        if tag.strip()
+    }
+
+
+def overlay_stock(payload):
+    """Refresh current_stock of payload items from the stock cache"""
+    items = [item for item in payload.get("items") or [] if item.get("item_code")]
+    stock_map = get_cached_stock_map(get_item_codes(items))
+    for item in items:
+        item["current_stock"] = stock_map.get(item["item_code"], 0)
+
+
+def get_etag(payload):
+    content = frappe.as_json({key: value for key, value in payload.items() if key != "etag"}, indent=None)
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+def get_payload_cache_ttl():
+    return cint(frappe.conf.get("boq_payload_cache_ttl")) or DEFAULT_PAYLOAD_CACHE_TTL
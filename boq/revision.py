@@ -0,0 +1,332 @@
+# Copyright (c) 2026, Som and contributors
+# For license information, please see license.txt
+
+# revision.py (Server-side)
+#
+# Revision chains of Technical Offer, Purchase BOQ and Commercial Offer.
+# Each chain (base_document) has one BOQ Revision Counter row holding the
+# last revision handed out and the name of the latest revision. Allocating
+# a revision locks that single row, so naming is constant-time and two
+# users revising the same document at once get R1 and R2, not R1 twice.
+
+import frappe
+from frappe import _
+from frappe.model import data_fieldtypes
+from frappe.utils import cint
+
+COUNTER_DOCTYPE = "BOQ Revision Counter"
+
+REVISION_DOCTYPES = ("Technical Offer", "Purchase BOQ", "Commercial Offer")
+
+# Child rows of two revisions are matched on these fields, where present
+DIFF_KEY_FIELDS = {
+    "items": ("item_code", "tag_no"),
+    "services": ("service_code",),
+}
+
+# Fields that change without anyone editing the row
+DIFF_IGNORED_FIELDS = ("current_stock",)
+
+# Redis hashes: revision name -> base_document, chain -> latest revision name
+REVISION_BASE_CACHE_KEY = "boq_revision_base"
+LATEST_REVISION_CACHE_KEY = "boq_latest_revision"
+
+DIFF_CACHE_KEY = "boq_revision_diff"
+DIFF_CACHE_TTL = 24 * 60 * 60
+
+
+def get_counter_name(doctype, base_document):
+    return f"{doctype}::{base_document}"
+
+
+def start_revision_chain(doctype, base_document):
+    """Create the counter of a new chain whose revision 0 is base_document"""
+    _insert_counter(doctype, base_document, last_revision=0, latest_name=base_document)
+
+
+def allocate_revision(doctype, base_document):
+    """Reserve the next revision of a chain and retire its current latest row
+
+    Returns revision, name and previous_version for the new document.
+    """
+    counter = _lock_counter(doctype, base_document)
+
+    revision = cint(counter.last_revision) + 1
+    name = f"{base_document}-R{revision}"
+    previous_version = counter.latest_name
+
+    frappe.db.set_value(
+        COUNTER_DOCTYPE,
+        counter.name,
+        {"last_revision": revision, "latest_name": name},
+        update_modified=False
+    )
+
+    if previous_version:
+        frappe.db.set_value(doctype, previous_version, "is_latest", 0, update_modified=False)
+
+    # readers see the new latest revision only once it is committed
+    counter_name = get_counter_name(doctype, base_document)
+    frappe.cache().hdel(LATEST_REVISION_CACHE_KEY, counter_name)
+    frappe.db.after_commit.add(
+        lambda: frappe.cache().hset(LATEST_REVISION_CACHE_KEY, counter_name, name)
+    )
+
+    return frappe._dict({
+        "revision": revision,
+        "name": name,
+        "previous_version": previous_version
+    })
+
+
+def remove_from_revision_chain(doc):
+    """on_trash: hand the latest flag back to the highest remaining revision
+
+    Deleting the last document of a chain removes its counter. Revision
+    numbers are not handed out again.
+    """
+    base_document = doc.base_document or doc.name
+    counter_name = get_counter_name(doc.doctype, base_document)
+    counter = frappe.db.get_value(COUNTER_DOCTYPE, counter_name, "latest_name", for_update=True)
+
+    remaining = frappe.get_all(
+        doc.doctype,
+        filters={"base_document": base_document, "name": ["!=", doc.name]},
+        order_by="revision desc",
+        limit=1,
+        pluck="name"
+    )
+
+    if not remaining:
+        frappe.db.delete(COUNTER_DOCTYPE, {"name": counter_name})
+    elif doc.is_latest or counter == doc.name:
+        frappe.db.set_value(doc.doctype, remaining[0], "is_latest", 1, update_modified=False)
+        frappe.db.set_value(COUNTER_DOCTYPE, counter_name, "latest_name", remaining[0], update_modified=False)
+
+    def clear_cache():
+        frappe.cache().hdel(REVISION_BASE_CACHE_KEY, f"{doc.doctype}::{doc.name}")
+        frappe.cache().hdel(LATEST_REVISION_CACHE_KEY, counter_name)
+
+    # again after commit, in case a reader cached the old latest row meanwhile
+    clear_cache()
+    frappe.db.after_commit.add(clear_cache)
+
+
+@frappe.whitelist()
+def get_latest_revision(doctype, name):
+    """Name of the latest revision in the chain of any revision name
+
+    Both lookups are cached, so a warm call costs two Redis hash reads.
+    """
+    if doctype not in REVISION_DOCTYPES:
+        frappe.throw(_("{0} does not have revisions").format(doctype))
+
+    frappe.has_permission(doctype, "read", throw=True)
+
+    cache = frappe.cache()
+    base_key = f"{doctype}::{name}"
+    base_document = cache.hget(
+        REVISION_BASE_CACHE_KEY,
+        base_key,
+        generator=lambda: frappe.db.get_value(doctype, name, "base_document")
+    )
+    if not base_document:
+        # unknown name, or a document saved before revisions existed
+        cache.hdel(REVISION_BASE_CACHE_KEY, base_key)
+        return name if frappe.db.exists(doctype, name) else None
+
+    return cache.hget(
+        LATEST_REVISION_CACHE_KEY,
+        get_counter_name(doctype, base_document),
+        generator=lambda: _get_latest_name(doctype, base_document)
+    )
+
+
+def validate_latest_revision(doc, link_field, link_doctype):
+    """Warn when a new or relinked document points at a superseded revision"""
+    link = doc.get(link_field)
+    if not link or not (doc.is_new() or doc.has_value_changed(link_field)):
+        return
+
+    latest = get_latest_revision(link_doctype, link)
+    if latest and latest != link:
+        frappe.msgprint(
+            _("{0} {1} has been revised, the latest revision is {2}").format(
+                _(link_doctype), frappe.bold(link), frappe.bold(latest)
+            ),
+            indicator="orange",
+            alert=True
+        )
+
+
+def add_revision_indexes(doctype):
+    """Composite indexes for chain lookups; called from on_doctype_update and a patch"""
+    frappe.db.add_index(doctype, ["base_document", "revision"])
+    frappe.db.add_index(doctype, ["base_document", "is_latest"])
+
+
+def _get_latest_name(doctype, base_document):
+    latest_name = frappe.db.get_value(
+        COUNTER_DOCTYPE, get_counter_name(doctype, base_document), "latest_name"
+    )
+    if latest_name:
+        return latest_name
+
+    # chains that predate counters
+    latest = frappe.get_all(
+        doctype,
+        filters={"base_document": base_document},
+        order_by="revision desc",
+        limit=1,
+        pluck="name"
+    )
+    return latest[0] if latest else base_document
+
+
+def _lock_counter(doctype, base_document):
+    """SELECT ... FOR UPDATE the chain's counter, seeding it for chains that predate counters"""
+    counter_name = get_counter_name(doctype, base_document)
+    fields = ["name", "last_revision", "latest_name"]
+
+    counter = frappe.db.get_value(COUNTER_DOCTYPE, counter_name, fields, as_dict=True, for_update=True)
+    if counter:
+        return counter
+
+    latest = frappe.get_all(
+        doctype,
+        filters={"base_document": base_document},
+        fields=["name", "revision"],
+        order_by="revision desc",
+        limit=1
+    )
+    _insert_counter(
+        doctype,
+        base_document,
+        last_revision=cint(latest[0].revision) if latest else 0,
+        latest_name=latest[0].name if latest else None
+    )
+
+    # a concurrent request may have seeded it first; either way it exists now
+    return frappe.db.get_value(COUNTER_DOCTYPE, counter_name, fields, as_dict=True, for_update=True)
+
+
+def _insert_counter(doctype, base_document, last_revision, latest_name):
+    frappe.get_doc({
+        "doctype": COUNTER_DOCTYPE,
+        "reference_doctype": doctype,
+        "base_document": base_document,
+        "last_revision": last_revision,
+        "latest_name": latest_name
+    }).insert(ignore_permissions=True, ignore_links=True, ignore_if_duplicate=True)
+
+
+@frappe.whitelist()
+def get_revision_diff(doctype, from_name, to_name):
+    """Rows added, removed and changed between two revisions of the same chain
+
+    Rows are matched on DIFF_KEY_FIELDS; repeated keys are paired in idx
+    order. Results are cached per revision pair and their modified timestamps.
+    """
+    if doctype not in REVISION_DOCTYPES:
+        frappe.throw(_("Revision diff is not supported for {0}").format(doctype))
+
+    revisions = {
+        row.name: row
+        for row in frappe.get_all(
+            doctype,
+            filters={"name": ["in", [from_name, to_name]]},
+            fields=["name", "base_document", "modified"]
+        )
+    }
+    for name in (from_name, to_name):
+        if name not in revisions:
+            frappe.throw(_("{0} {1} not found").format(_(doctype), name))
+        frappe.has_permission(doctype, "read", name, throw=True)
+
+    if revisions[from_name].base_document != revisions[to_name].base_document:
+        frappe.throw(_("{0} and {1} are not revisions of the same document").format(from_name, to_name))
+
+    cache_key = "|".join([
+        DIFF_CACHE_KEY, doctype,
+        from_name, str(revisions[from_name].modified),
+        to_name, str(revisions[to_name].modified)
+    ])
+    diff = frappe.cache().get_value(cache_key)
+    if diff is None:
+        diff = compute_revision_diff(doctype, from_name, to_name)
+        frappe.cache().set_value(cache_key, diff, expires_in_sec=DIFF_CACHE_TTL)
+
+    return diff
+
+
+def compute_revision_diff(doctype, from_name, to_name):
+    tables = {}
+    summary = {"added": 0, "removed": 0, "changed": 0}
+
+    for df in frappe.get_meta(doctype).get_table_fields():
+        child_meta = frappe.get_meta(df.options)
+        key_fields = [
+            field for field in DIFF_KEY_FIELDS.get(df.fieldname, ("name",))
+            if field == "name" or child_meta.has_field(field)
+        ]
+        compare_fields = [
+            field.fieldname for field in child_meta.fields
+            if field.fieldtype in data_fieldtypes
+            and field.fieldname not in key_fields
+            and field.fieldname not in DIFF_IGNORED_FIELDS
+        ]
+
+        old_rows = _get_keyed_rows(doctype, from_name, df, key_fields, compare_fields)
+        new_rows = _get_keyed_rows(doctype, to_name, df, key_fields, compare_fields)
+
+        table = {"added": [], "removed": [], "changed": []}
+        for key, new in new_rows.items():
+            old = old_rows.pop(key, None)
+            if old is None:
+                table["added"].append(new)
+                continue
+
+            changes = {
+                field: [old.get(field), new.get(field)]
+                for field in compare_fields
+                if old.get(field) != new.get(field)
+            }
+            if changes:
+                table["changed"].append({
+                    "key": {field: new.get(field) for field in key_fields},
+                    "idx": new.idx,
+                    "changes": changes
+                })
+
+        table["removed"] = list(old_rows.values())
+
+        for change_type in summary:
+            summary[change_type] += len(table[change_type])
+        tables[df.fieldname] = table
+
+    return {
+        "doctype": doctype,
+        "from_name": from_name,
+        "to_name": to_name,
+        "tables": tables,
+        "summary": summary
+    }
+
+
+def _get_keyed_rows(doctype, parent, table_df, key_fields, compare_fields):
+    """{(key values..., occurrence): row} for one child table of one revision"""
+    rows = frappe.get_all(
+        table_df.options,
+        filters={"parent": parent, "parenttype": doctype, "parentfield": table_df.fieldname},
+        fields=["idx", *dict.fromkeys(key_fields + compare_fields)],
+        order_by="idx"
+    )
+
+    keyed = {}
+    occurrences = {}
+    for row in rows:
+        key = tuple(row.get(field) or "" for field in key_fields)
+        occurrences[key] = occurrences.get(key, 0) + 1
+        keyed[(*key, occurrences[key])] = row
+
+    return keyed
@@ -0,0 +1,303 @@
+# Copyright (c) 2026, Som and contributors
+# For license information, please see license.txt
+
+# row_changes.py (Server-side)
+#
+# Row-level saves for large draft BOQ documents. The client sends only the
+# child rows it changed, added or removed together with the modified
+# timestamp it loaded; they are written with targeted UPDATE / INSERT /
+# DELETE statements and the parent's totals are adjusted by the row deltas
+# instead of loading, validating and rewriting the whole document.
+#
+# Controller validate and the validate doc_events do not run. Client values
+# are cast to their field types, Link values are checked, amounts and totals
+# are recomputed, and the stock check is queued for the saved rows of
+# doctypes that have one. Parent fields are never changed here, so the
+# superseded-revision warning (validate_latest_revision) does not apply.
+#
+# changes = {
+#     "items": {
+#         "updated": [{"name": "a1b2c3", "rate": 120}],
+#         "added": [{"item_code": "VALVE-001", "qyt": 2, "rate": 80}],
+#         "removed": ["d4e5f6"]
+#     },
+#     "services": {...}
+# }
+
+from collections import Counter
+
+import frappe
+from frappe import _
+from frappe.model import data_fieldtypes
+from frappe.utils import cint, flt, get_datetime, now
+from frappe.utils.data import cast
+
+from boq.boq.doctype.commercial_offer import commercial_offer
+from boq.boq.doctype.purchase_boq import purchase_boq
+from boq.instrumentation import instrument
+from boq.stock import queue_stock_check
+from boq.totals import adjust_total, calculate_row_amounts, get_amount_precision
+
+ROW_CHANGE_DOCTYPES = ("Technical Offer", "Purchase BOQ", "Commercial Offer")
+
+# Doctypes whose items are stock-checked on validate (see hooks.py)
+STOCK_CHECK_DOCTYPES = ("Purchase BOQ", "Commercial Offer")
+
+# parent table field -> parent total field, for doctypes with totals
+TOTAL_FIELDS = {
+    "items": "item_total",
+    "services": "services_total",
+}
+
+# parent table field -> row fields set by the totals engine, per doctype with totals
+ROW_TOTAL_FIELDS = {
+    "Purchase BOQ": {
+        "items": purchase_boq.ITEM_TOTAL_FIELDS,
+        "services": purchase_boq.SERVICE_TOTAL_FIELDS,
+    },
+    "Commercial Offer": {
+        "items": commercial_offer.ITEM_TOTAL_FIELDS,
+        "services": commercial_offer.SERVICE_TOTAL_FIELDS,
+    },
+}
+
+# Row columns that are never taken from the client
+PROTECTED_COLUMNS = (
+    "name", "parent", "parenttype", "parentfield", "idx", "docstatus",
+    "owner", "creation", "modified", "modified_by",
+)
+
+
+@frappe.whitelist()
+@instrument
+def apply_row_changes(doctype, name, modified, changes):
+    """Apply changed, added and removed child rows to a draft document
+
+    modified must be the timestamp the client loaded; a document saved since
+    then is rejected. Returns the new modified timestamp, the parent totals
+    and the names given to added rows, in the order they were sent.
+
+    This skips controller validate and validate doc_events (see the module
+    comment for what is checked instead).
+    """
+    if doctype not in ROW_CHANGE_DOCTYPES:
+        frappe.throw(_("Row changes are not supported for {0}").format(doctype))
+
+    changes = frappe.parse_json(changes) if isinstance(changes, str) else changes
+    frappe.has_permission(doctype, "write", name, throw=True)
+
+    meta = frappe.get_meta(doctype)
+    has_totals = meta.has_field("grand_total")
+    parent = frappe.db.get_value(
+        doctype,
+        name,
+        ["modified", "docstatus", *(list(TOTAL_FIELDS.values()) if has_totals else [])],
+        as_dict=True,
+        for_update=True
+    )
+    if not parent:
+        frappe.throw(_("{0} {1} not found").format(_(doctype), name), frappe.DoesNotExistError)
+
+    if get_datetime(parent.modified) != get_datetime(modified):
+        frappe.throw(
+            _("{0} {1} has been modified after you opened it, please reload").format(_(doctype), name),
+            frappe.TimestampMismatchError
+        )
+
+    if cint(parent.docstatus) != 0:
+        frappe.throw(_("Row changes can only be applied to draft documents"))
+
+    values = {}
+    added_names = {}
+
+    for fieldname, table_changes in (changes or {}).items():
+        table_df = meta.get_field(fieldname)
+        if not table_df or table_df.fieldtype != "Table":
+            frappe.throw(_("{0} is not a table of {1}").format(fieldname, doctype))
+
+        fields = ROW_TOTAL_FIELDS.get(doctype, {}).get(fieldname) if has_totals else None
+        old_rows, new_rows, added_names[fieldname] = apply_table_changes(
+            doctype, name, table_df, table_changes or {}, fields
+        )
+
+        if fields and fieldname in TOTAL_FIELDS:
+            total_field = TOTAL_FIELDS[fieldname]
+            parent[total_field] = values[total_field] = adjust_total(
+                parent.get(total_field), old_rows, new_rows, fields
+            )
+
+    if has_totals and _has_legacy_rows(doctype, name, meta):
+        # rows saved before final_amount was stored: the deltas cannot be
+        # trusted, so recompute everything once through a full save
+        doc = frappe.get_doc(doctype, name)
+        doc.flags.recompute_totals = True
+        doc.save()
+        values = {field: doc.get(field) for field in (*TOTAL_FIELDS.values(), "grand_total", "modified")}
+    else:
+        if has_totals:
+            values["grand_total"] = flt(
+                flt(parent.get("item_total")) + flt(parent.get("services_total")), get_amount_precision()
+            )
+
+        values["modified"] = now()
+        values["modified_by"] = frappe.session.user
+        frappe.db.set_value(doctype, name, values, update_modified=False)
+        frappe.clear_document_cache(doctype, name)
+
+    if doctype in STOCK_CHECK_DOCTYPES and (changes or {}).get("items"):
+        queue_stock_check(doctype, name)
+
+    return {
+        "modified": values["modified"],
+        "totals": {field: values.get(field, parent.get(field)) for field in (*TOTAL_FIELDS.values(), "grand_total")}
+        if has_totals else {},
+        "added": added_names
+    }
+
+
+def apply_table_changes(doctype, name, table_df, table_changes, fields=None):
+    """Write one table's changes; return (replaced saved rows, written rows, added row names)"""
+    child_doctype = table_df.options
+    child_meta = frappe.get_meta(child_doctype)
+    editable = {
+        df.fieldname for df in child_meta.fields
+        if df.fieldtype in data_fieldtypes and df.fieldname not in PROTECTED_COLUMNS
+        and not (fields and df.fieldname in fields)
+    }
+
+    updated = table_changes.get("updated") or []
+    added = table_changes.get("added") or []
+    removed = list(table_changes.get("removed") or [])
+
+    updated_names = [row.get("name") for row in updated]
+    if not all(updated_names):
+        frappe.throw(_("Every updated row of {0} must have a name").format(table_df.fieldname))
+
+    # saved state of every touched row, in one query
+    touched = updated_names + removed
+    duplicates = [row_name for row_name, count in Counter(touched).items() if count > 1]
+    if duplicates:
+        frappe.throw(_("Rows {0} are changed more than once").format(", ".join(sorted(map(str, duplicates)))))
+
+    saved_rows = {
+        row.name: row
+        for row in frappe.get_all(
+            child_doctype,
+            filters={"name": ["in", touched], "parent": name, "parenttype": doctype, "parentfield": table_df.fieldname},
+            fields=["*"]
+        )
+    } if touched else {}
+
+    missing = set(touched) - set(saved_rows)
+    if missing:
+        frappe.throw(_("Rows {0} do not belong to {1}").format(", ".join(sorted(map(str, missing))), name))
+
+    updated = [_cast_values(child_meta, change, editable) for change in updated]
+    added = [_cast_values(child_meta, row, editable) for row in added]
+    _validate_links(child_meta, [*updated, *added])
+
+    # updated rows: merge over the saved row, recompute, write only what changed
+    new_rows = []
+    for row_name, change in zip(updated_names, updated, strict=True):
+        row = frappe._dict(saved_rows[row_name])
+        row.update(change)
+        new_rows.append(row)
+
+    if fields:
+        calculate_row_amounts(new_rows, table_df.fieldname, fields)
+
+    for row in new_rows:
+        saved = saved_rows[row.name]
+        row_values = {
+            field: row.get(field)
+            for field in (*editable, *(fields or ()))
+            if row.get(field) != saved.get(field)
+        }
+        if row_values:
+            frappe.db.set_value(child_doctype, row.name, row_values, update_modified=False)
+
+    # added rows: appended after the current last row, in one multi-row INSERT
+    added_rows = [frappe._dict(row) for row in added]
+    if fields:
+        calculate_row_amounts(added_rows, table_df.fieldname, fields)
+
+    if added_rows:
+        _insert_rows(doctype, name, table_df, added_rows)
+
+    if removed:
+        frappe.db.delete(child_doctype, {"name": ["in", removed], "parent": name})
+
+    old_rows = [saved_rows[row_name] for row_name in touched]
+    return old_rows, new_rows + added_rows, [row.name for row in added_rows]
+
+
+def _cast_values(child_meta, row, editable):
+    """Editable values of a client row, cast to their field types"""
+    return {
+        field: cast(child_meta.get_field(field).fieldtype, value)
+        for field, value in row.items()
+        if field in editable
+    }
+
+
+def _has_legacy_rows(doctype, name, meta):
+    """Rows with an amount but no stored final_amount (see boq.totals)"""
+    for table_df in meta.get_table_fields():
+        if table_df.fieldname in TOTAL_FIELDS and frappe.db.sql(
+            f"""
+            SELECT name FROM `tab{table_df.options}`
+            WHERE parent = %s AND parenttype = %s AND parentfield = %s
+                AND IFNULL(final_amount, 0) = 0 AND IFNULL(amount, 0) <> 0
+            LIMIT 1
+            """,
+            (name, doctype, table_df.fieldname)
+        ):
+            return True
+
+    return False
+
+
+def _insert_rows(doctype, name, table_df, rows):
+    child_doctype = table_df.options
+    idx = cint(frappe.db.sql(
+        f"""
+        SELECT MAX(idx) FROM `tab{child_doctype}`
+        WHERE parent = %s AND parenttype = %s AND parentfield = %s
+        """,
+        (name, doctype, table_df.fieldname)
+    )[0][0])
+
+    timestamp = now()
+    user = frappe.session.user
+    columns = sorted({field for row in rows for field in row})
+
+    for i, row in enumerate(rows, start=1):
+        row.name = frappe.generate_hash(length=10)
+        row.idx = idx + i
+
+    frappe.db.bulk_insert(
+        child_doctype,
+        [
+            "name", "creation", "modified", "owner", "modified_by", "docstatus",
+            "parent", "parenttype", "parentfield", "idx", *columns
+        ],
+        [
+            (
+                row.name, timestamp, timestamp, user, user, 0,
+                name, doctype, table_df.fieldname, row.idx, *(row.get(column) for column in columns)
+            )
+            for row in rows
+        ]
+    )
+
+
+def _validate_links(child_meta, rows):
+    """Check every Link value sent by the client exists, one query per linked doctype"""
+    for df in child_meta.get_link_fields():
+        values = {row.get(df.fieldname) for row in rows if row.get(df.fieldname)}
+        if not values:
+            continue
+
+        existing = set(frappe.get_all(df.options, filters={"name": ["in", list(values)]}, pluck="name"))
+        for value in values - existing:
+            frappe.throw(_("{0} {1} does not exist").format(_(df.options), value), frappe.LinkValidationError)
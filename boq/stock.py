@@ -0,0 +1,425 @@
+# Copyright (c) 2025, Som and contributors
+# For license information, please see license.txt
+
+# stock.py (Server-side)
+#
+# Shared stock lookups for BOQ documents. Every helper resolves all item
+# codes of a document in a single Bin query instead of one query per row.
+# Totals are also cached per item in Redis and dropped whenever a Stock
+# Ledger Entry for the item is submitted or cancelled (see doc_events in
+# hooks.py). ERPNext writes Bin with db_set, so Bin changes that do not come
+# from the stock ledger are only picked up when the cached value expires.
+# Available-to-promise adds reserved, ordered and projected Bin quantities
+# and the quantities of open Commercial Offers to the same picture; those
+# are dropped on Sales Order, Purchase Order and Commercial Offer submit and
+# cancel as well.
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt
+
+STOCK_CACHE_KEY = "boq_item_stock"
+ATP_CACHE_KEY = "boq_item_atp"
+STOCK_CACHE_STATS_KEY = "boq_item_stock_stats"
+
+# Seconds a cached stock total stays valid even without invalidation; the
+# only bound on staleness for Bin updates outside the stock ledger.
+# Set "boq_stock_cache_ttl" in site_config.json to change it.
+DEFAULT_STOCK_CACHE_TTL = 300
+
+# Documents with more item rows than this have their stock checked in a
+# background job. Set "boq_stock_check_async_rows" in site_config.json.
+DEFAULT_ASYNC_STOCK_CHECK_ROWS = 500
+
+STOCK_AVAILABILITY_EVENT = "boq_stock_availability"
+
+ATP_FIELDS = ("actual_qty", "reserved_qty", "ordered_qty", "projected_qty", "offered_qty")
+
+
+def get_item_codes(rows):
+    """Return unique, non-empty item codes of child rows, in row order"""
+    return list(dict.fromkeys(row.get("item_code") for row in rows or [] if row.get("item_code")))
+
+
+def get_stock_map(item_codes):
+    """Return {item_code: total actual_qty across all warehouses}"""
+    item_codes = list(set(filter(None, item_codes or [])))
+    if not item_codes:
+        return {}
+
+    bins = frappe.get_all(
+        "Bin",
+        filters={"item_code": ["in", item_codes]},
+        fields=["item_code", "sum(actual_qty) as actual_qty"],
+        group_by="item_code"
+    )
+
+    stock_map = dict.fromkeys(item_codes, 0)
+    for row in bins:
+        stock_map[row.item_code] = flt(row.actual_qty)
+
+    return stock_map
+
+
+def get_warehouse_stock_map(item_codes):
+    """Return {item_code: [{"warehouse", "actual_qty"}, ...]} from one Bin query"""
+    item_codes = list(set(filter(None, item_codes or [])))
+    if not item_codes:
+        return {}
+
+    bins = frappe.get_all(
+        "Bin",
+        filters={"item_code": ["in", item_codes]},
+        fields=["item_code", "warehouse", "actual_qty"],
+        order_by="item_code, warehouse"
+    )
+
+    warehouse_map = {item_code: [] for item_code in item_codes}
+    for row in bins:
+        warehouse_map[row.item_code].append(
+            frappe._dict({"warehouse": row.warehouse, "actual_qty": flt(row.actual_qty)})
+        )
+
+    return warehouse_map
+
+
+def get_item_stock(item_code):
+    """Get total stock for an item across all warehouses"""
+    return get_stock_map([item_code]).get(item_code, 0)
+
+
+def get_cached_stock_map(item_codes):
+    """Same as get_stock_map, served from the per-item Redis cache where possible"""
+    item_codes = list(set(filter(None, item_codes or [])))
+    if not item_codes:
+        return {}
+
+    cache = frappe.cache()
+    values = cache.mget([_get_stock_cache_key(item_code) for item_code in item_codes])
+
+    stock_map = {}
+    missing = []
+    for item_code, value in zip(item_codes, values, strict=True):
+        if value is None:
+            missing.append(item_code)
+        else:
+            stock_map[item_code] = flt(frappe.safe_decode(value))
+
+    if missing:
+        fresh = get_stock_map(missing)
+        ttl = get_stock_cache_ttl()
+
+        pipe = cache.pipeline()
+        for item_code, qty in fresh.items():
+            pipe.setex(_get_stock_cache_key(item_code), ttl, qty)
+        pipe.execute()
+
+        stock_map.update(fresh)
+
+    _record_stock_cache_stats(hits=len(item_codes) - len(missing), misses=len(missing))
+    return stock_map
+
+
+def get_atp_map(item_codes):
+    """Return {item_code: _dict} of Bin quantities, open offer quantities and ATP
+
+    offered_qty is the quantity on submitted, latest Commercial Offers that
+    have no Sales Order yet. available_qty = actual - reserved - offered and
+    atp_qty = projected - offered. Cached per item like get_cached_stock_map.
+    """
+    item_codes = list(set(filter(None, item_codes or [])))
+    if not item_codes:
+        return {}
+
+    cache = frappe.cache()
+    values = cache.mget([_get_atp_cache_key(item_code) for item_code in item_codes])
+
+    atp_map = {}
+    missing = []
+    for item_code, value in zip(item_codes, values, strict=True):
+        if value is None:
+            missing.append(item_code)
+        else:
+            atp_map[item_code] = frappe._dict(frappe.parse_json(frappe.safe_decode(value)))
+
+    if missing:
+        fresh = _get_atp_quantities(missing)
+        ttl = get_stock_cache_ttl()
+
+        pipe = cache.pipeline()
+        for item_code, quantities in fresh.items():
+            pipe.setex(_get_atp_cache_key(item_code), ttl, frappe.as_json(quantities, indent=None))
+        pipe.execute()
+
+        atp_map.update(fresh)
+
+    for quantities in atp_map.values():
+        _set_atp(quantities)
+
+    return atp_map
+
+
+@frappe.whitelist()
+def get_available_to_promise(doctype, name):
+    """ATP of every item of a Purchase BOQ or Commercial Offer
+
+    An open Commercial Offer does not compete with itself: its own rows are
+    taken out of offered_qty.
+    """
+    if doctype not in ("Purchase BOQ", "Commercial Offer"):
+        frappe.throw(_("Available to promise is not supported for {0}").format(doctype))
+
+    frappe.has_permission(doctype, "read", name, throw=True)
+
+    rows = frappe.get_all(
+        frappe.get_meta(doctype).get_field("items").options,
+        filters={"parent": name, "parenttype": doctype, "parentfield": "items"},
+        fields=["item_code", "qyt"]
+    )
+    atp_map = get_atp_map(get_item_codes(rows))
+
+    if doctype == "Commercial Offer" and _is_open_offer(name):
+        for row in rows:
+            if row.item_code in atp_map:
+                atp_map[row.item_code].offered_qty -= flt(row.qyt)
+        for quantities in atp_map.values():
+            _set_atp(quantities)
+
+    return atp_map
+
+
+def _get_atp_quantities(item_codes):
+    """Bin and open-offer quantities of item_codes in one UNION ALL query"""
+    rows = frappe.db.sql(
+        """
+        SELECT item_code,
+            SUM(actual_qty) AS actual_qty,
+            SUM(reserved_qty) AS reserved_qty,
+            SUM(ordered_qty) AS ordered_qty,
+            SUM(projected_qty) AS projected_qty,
+            SUM(offered_qty) AS offered_qty
+        FROM (
+            SELECT item_code, actual_qty, reserved_qty, ordered_qty, projected_qty, 0 AS offered_qty
+            FROM `tabBin`
+            WHERE item_code IN %(item_codes)s
+
+            UNION ALL
+
+            SELECT item.item_code, 0, 0, 0, 0, item.qyt
+            FROM `tabPurchase BOQ Item` item
+            INNER JOIN `tabCommercial Offer` offer ON offer.name = item.parent
+            WHERE item.parenttype = 'Commercial Offer'
+                AND item.parentfield = 'items'
+                AND item.item_code IN %(item_codes)s
+                AND offer.docstatus = 1
+                AND offer.is_latest = 1
+                AND IFNULL(offer.sales_order, '') = ''
+        ) quantities
+        GROUP BY item_code
+        """,
+        {"item_codes": tuple(item_codes)},
+        as_dict=True
+    )
+
+    atp_map = {item_code: frappe._dict(dict.fromkeys(ATP_FIELDS, 0)) for item_code in item_codes}
+    for row in rows:
+        atp_map[row.item_code] = frappe._dict({field: flt(row.get(field)) for field in ATP_FIELDS})
+
+    return atp_map
+
+
+def _set_atp(quantities):
+    quantities.available_qty = flt(quantities.actual_qty - quantities.reserved_qty - quantities.offered_qty)
+    quantities.atp_qty = flt(quantities.projected_qty - quantities.offered_qty)
+
+
+def _is_open_offer(name):
+    offer = frappe.db.get_value(
+        "Commercial Offer", name, ["docstatus", "is_latest", "sales_order"], as_dict=True
+    )
+    return bool(offer and offer.docstatus == 1 and offer.is_latest and not offer.sales_order)
+
+
+def get_stock_cache_ttl():
+    return cint(frappe.conf.get("boq_stock_cache_ttl")) or DEFAULT_STOCK_CACHE_TTL
+
+
+def clear_stock_cache(item_codes=None):
+    """Drop cached stock totals and ATP quantities for the given item codes"""
+    item_codes = list(set(filter(None, item_codes or [])))
+    if item_codes:
+        frappe.cache().delete(*[
+            key
+            for item_code in item_codes
+            for key in (_get_stock_cache_key(item_code), _get_atp_cache_key(item_code))
+        ])
+
+
+def invalidate_stock_cache(doc, method=None):
+    """Stock Ledger Entry doc_events hook: drop the item's cached stock after commit"""
+    if not doc.get("item_code"):
+        return
+
+    item_code = doc.item_code
+    frappe.db.after_commit.add(lambda: clear_stock_cache([item_code]))
+
+
+def validate_stock_availability(doc, method=None):
+    """doc_events hook for Purchase BOQ / Commercial Offer (validate)
+
+    Refreshes current_stock on every row from live Bin totals and warns about
+    shortages. Large documents are checked in a background job instead, and
+    the result is published as a realtime event; submit is never blocked.
+    """
+    if len(doc.get("items") or []) > get_async_stock_check_rows():
+        queue_stock_check(doc.doctype, doc.name)
+        return
+
+    stock_map = get_stock_map(get_item_codes(doc.items))
+    for row in doc.items:
+        row.current_stock = stock_map.get(row.item_code, 0) if row.item_code else 0
+
+    shortages = get_shortages(doc.items, stock_map)
+    if shortages:
+        frappe.msgprint(
+            _("Following items have insufficient stock:") + "<br>" + "<br>".join(
+                _("• {0}: Required {1}, Available {2}").format(
+                    row.item_name or row.item_code, row.required, row.available
+                )
+                for row in shortages
+            ),
+            indicator="orange",
+            title=_("Low Stock Warning")
+        )
+
+
+def queue_stock_check(doctype, name):
+    """Run check_stock_availability on the saved rows once the transaction commits"""
+    frappe.enqueue(
+        "boq.stock.check_stock_availability",
+        queue="short",
+        job_id=f"boq_stock_check|{doctype}|{name}",
+        deduplicate=True,
+        enqueue_after_commit=True,
+        doctype=doctype,
+        name=name,
+        user=frappe.session.user
+    )
+
+
+def check_stock_availability(doctype, name, user=None):
+    """Background job: refresh current_stock on the saved rows and publish shortages"""
+    child_doctype = frappe.get_meta(doctype).get_field("items").options
+    rows = frappe.get_all(
+        child_doctype,
+        filters={"parent": name, "parenttype": doctype, "parentfield": "items"},
+        fields=["item_code", "item_name", "qyt"]
+    )
+    item_codes = get_item_codes(rows)
+    stock_map = get_stock_map(item_codes)
+
+    if item_codes:
+        # one UPDATE for all rows, joined to the same grouped Bin totals
+        frappe.db.sql(
+            f"""
+            UPDATE `tab{child_doctype}` child
+            LEFT JOIN (
+                SELECT item_code, SUM(actual_qty) AS actual_qty
+                FROM `tabBin`
+                WHERE item_code IN %(item_codes)s
+                GROUP BY item_code
+            ) bin ON bin.item_code = child.item_code
+            SET child.current_stock = IFNULL(bin.actual_qty, 0)
+            WHERE child.parent = %(name)s
+                AND child.parenttype = %(doctype)s
+                AND child.parentfield = 'items'
+            """,
+            {"name": name, "doctype": doctype, "item_codes": tuple(item_codes)}
+        )
+    frappe.db.commit()
+
+    frappe.publish_realtime(
+        STOCK_AVAILABILITY_EVENT,
+        {"doctype": doctype, "name": name, "shortages": get_shortages(rows, stock_map)},
+        user=user,
+        doctype=doctype,
+        docname=name
+    )
+
+
+def get_shortages(rows, stock_map):
+    """Items whose total required qty across rows exceeds their stock"""
+    required = {}
+    item_names = {}
+    for row in rows or []:
+        if row.get("item_code"):
+            required[row.item_code] = required.get(row.item_code, 0) + flt(row.get("qyt"))
+            item_names.setdefault(row.item_code, row.get("item_name"))
+
+    return [
+        frappe._dict({
+            "item_code": item_code,
+            "item_name": item_names[item_code],
+            "required": qty,
+            "available": flt(stock_map.get(item_code))
+        })
+        for item_code, qty in required.items()
+        if qty > flt(stock_map.get(item_code))
+    ]
+
+
+def get_async_stock_check_rows():
+    return cint(frappe.conf.get("boq_stock_check_async_rows")) or DEFAULT_ASYNC_STOCK_CHECK_ROWS
+
+
+def invalidate_offer_stock_cache(doc, method=None):
+    """Commercial Offer doc_events hook: open offer quantities of its items changed"""
+    item_codes = get_item_codes(doc.get("items"))
+    frappe.db.after_commit.add(lambda: clear_stock_cache(item_codes))
+
+
+def invalidate_order_stock_cache(doc, method=None):
+    """Sales Order / Purchase Order doc_events hook: reserved or ordered quantities of its items changed"""
+    item_codes = get_item_codes(doc.get("items"))
+    frappe.db.after_commit.add(lambda: clear_stock_cache(item_codes))
+
+
+@frappe.whitelist()
+def get_stock_cache_stats():
+    """Hit/miss counters of the stock cache"""
+    frappe.only_for("System Manager")
+
+    cache = frappe.cache()
+    hits, misses = (
+        cint(frappe.safe_decode(value)) if value is not None else 0
+        for value in cache.mget([_get_stats_key("hits"), _get_stats_key("misses")])
+    )
+    lookups = hits + misses
+
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": flt(hits / lookups, 4) if lookups else 0,
+        "ttl": get_stock_cache_ttl()
+    }
+
+
+def _record_stock_cache_stats(hits, misses):
+    pipe = frappe.cache().pipeline()
+    if hits:
+        pipe.incrby(_get_stats_key("hits"), hits)
+    if misses:
+        pipe.incrby(_get_stats_key("misses"), misses)
+    pipe.execute()
+
+
+def _get_stock_cache_key(item_code):
+    return frappe.cache().make_key(f"{STOCK_CACHE_KEY}|{item_code}")
+
+
+def _get_atp_cache_key(item_code):
+    return frappe.cache().make_key(f"{ATP_CACHE_KEY}|{item_code}")
+
+
+def _get_stats_key(counter):
+    return frappe.cache().make_key(f"{STOCK_CACHE_STATS_KEY}|{counter}")
@@ -0,0 +1,191 @@
+# Copyright (c) 2025, Som and contributors
+# For license information, please see license.txt
+
+# totals.py (Server-side)
+#
+# Shared totals engine for Purchase BOQ and Commercial Offer. Amounts are
+# computed column-wise for a whole child table in one pass, in Decimal with
+# half-up rounding, and rows whose inputs did not change since the last
+# save keep their stored amounts instead of being recomputed. Table totals
+# are adjusted by the deltas of changed rows rather than summed again.
+
+from decimal import ROUND_HALF_UP, Decimal
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt
+
+ITEM_INPUTS = ("qyt", "rate", "discount")
+SERVICE_INPUTS = ("service_cost", "discount")
+
+
+def calculate_totals(doc, item_fields, service_fields):
+    """Compute row amounts, item_total, services_total and grand_total of doc
+
+    item_fields / service_fields map row fieldnames to computed columns,
+    e.g. {"amount": "final_amount", "discount_amount": "discount_amount"}.
+    Set doc.flags.recompute_totals to force a full recompute of every row.
+    """
+    precision = get_amount_precision()
+    before = None if doc.flags.recompute_totals else doc.get_doc_before_save()
+    check = is_totals_check_enabled(doc)
+
+    doc.item_total = calculate_table_total(
+        doc, before, "items", "item_total", ITEM_INPUTS, get_item_bases, item_fields, precision, check
+    )
+    doc.services_total = calculate_table_total(
+        doc, before, "services", "services_total", SERVICE_INPUTS, get_service_bases, service_fields, precision, check
+    )
+    doc.grand_total = flt(_to_decimal(doc.item_total) + _to_decimal(doc.services_total))
+
+
+def calculate_table_total(doc, before, fieldname, total_field, inputs, get_bases, fields, precision, check=False):
+    """Set computed columns on dirty rows and return the table's final total
+
+    When the last saved version is known, the saved total is adjusted by the
+    deltas of changed, added and removed rows. Otherwise (new document, or rows
+    saved before final_amount was stored) the total is summed from scratch.
+    """
+    rows = doc.get(fieldname) or []
+    final_field = _get_final_field(fields)
+    saved_rows = {row.name: row for row in before.get(fieldname) or []} if before else {}
+    clean_rows = get_clean_rows(rows, saved_rows, inputs)
+
+    dirty = [row for row in rows if row.name not in clean_rows]
+    if dirty:
+        columns = compute_amounts(
+            get_bases(dirty),
+            [row.get("discount") for row in dirty],
+            precision
+        )
+        for field, column in fields.items():
+            for row, value in zip(dirty, columns[column], strict=True):
+                row.set(field, flt(value))
+
+    for row in rows:
+        if row.name in clean_rows:
+            saved = clean_rows[row.name]
+            for field in fields:
+                row.set(field, saved.get(field))
+
+    if not before or any(_is_legacy_row(saved) for saved in saved_rows.values()):
+        return flt(_sum_rows(rows, final_field))
+
+    total = _to_decimal(before.get(total_field))
+    for name, saved in saved_rows.items():
+        if name not in clean_rows:
+            # changed or removed since the last save
+            total -= _to_decimal(saved.get(final_field))
+    for row in dirty:
+        total += _to_decimal(row.get(final_field))
+
+    if check:
+        expected = _sum_rows(rows, final_field)
+        if total != expected:
+            frappe.log_error(
+                title=_("BOQ totals mismatch"),
+                message=_("{0} {1}: incremental {2} was {3}, full recompute gives {4}").format(
+                    doc.doctype, doc.name, total_field, total, expected
+                )
+            )
+            total = expected
+
+    return flt(total)
+
+
+def calculate_row_amounts(rows, fieldname, fields, precision=None):
+    """Set computed columns on _dict rows of the "items" or "services" table"""
+    if not rows:
+        return
+
+    get_bases = get_item_bases if fieldname == "items" else get_service_bases
+    columns = compute_amounts(
+        get_bases(rows),
+        [row.get("discount") for row in rows],
+        precision or get_amount_precision()
+    )
+    for field, column in fields.items():
+        for row, value in zip(rows, columns[column], strict=True):
+            row[field] = flt(value)
+
+
+def adjust_total(total, old_rows, new_rows, fields):
+    """total minus the final amounts of old_rows plus those of new_rows"""
+    final_field = _get_final_field(fields)
+    return flt(_to_decimal(total) - _sum_rows(old_rows, final_field) + _sum_rows(new_rows, final_field))
+
+
+def compute_amounts(bases, discounts, precision):
+    """Batched amount / discount_amount / final_amount columns as Decimals
+
+    "discount" is a margin percentage, so it is added to the amount.
+    """
+    quantum = Decimal(1).scaleb(-cint(precision))
+
+    amount = [base.quantize(quantum, ROUND_HALF_UP) for base in bases]
+    discount_amount = [
+        (value * _to_decimal(discount) / 100).quantize(quantum, ROUND_HALF_UP)
+        for value, discount in zip(amount, discounts, strict=True)
+    ]
+    final_amount = [value + margin for value, margin in zip(amount, discount_amount, strict=True)]
+
+    return {
+        "amount": amount,
+        "discount_amount": discount_amount,
+        "final_amount": final_amount
+    }
+
+
+def get_item_bases(rows):
+    """qty * rate for item rows"""
+    return [_to_decimal(row.get("qyt")) * _to_decimal(row.get("rate")) for row in rows]
+
+
+def get_service_bases(rows):
+    """service_cost for service rows"""
+    return [_to_decimal(row.get("service_cost")) for row in rows]
+
+
+def get_clean_rows(rows, saved_rows, inputs):
+    """Return {row name: saved row} for rows whose inputs match the last saved version"""
+    clean_rows = {}
+
+    for row in rows:
+        saved = saved_rows.get(row.name)
+        if not saved or _is_legacy_row(saved):
+            continue
+
+        if all(flt(row.get(f)) == flt(saved.get(f)) for f in inputs):
+            clean_rows[row.name] = saved
+
+    return clean_rows
+
+
+def is_totals_check_enabled(doc):
+    """Consistency check mode: verify incremental totals against a full recompute"""
+    return bool(doc.flags.check_totals or frappe.conf.get("boq_totals_check"))
+
+
+def get_amount_precision():
+    return frappe.get_precision("Purchase BOQ Item", "amount") or 2
+
+
+def _get_final_field(fields):
+    for fieldname, column in fields.items():
+        if column == "final_amount":
+            return fieldname
+
+    frappe.throw(_("Totals field map must include final_amount"))
+
+
+def _is_legacy_row(saved):
+    # Rows saved before final_amount was stored have to be recomputed once
+    return bool(flt(saved.get("amount")) and not flt(saved.get("final_amount")))
+
+
+def _sum_rows(rows, final_field):
+    return sum((_to_decimal(row.get(final_field)) for row in rows), Decimal(0))
+
+
+def _to_decimal(value):
+    return Decimal(str(flt(value)))